@@ -1,5 +1,7 @@
 from xml.sax.saxutils import escape
-from typing import Union, List, Tuple, Any, Dict, Optional
+from typing import Union, List, Tuple, Any, Dict, Optional, Callable
+
+from .pdg import pdg_dot_statements_stream
 
 AST_Element = Union[str, Tuple[str, Any, ...], List[Any]]
 
@@ -309,42 +311,34 @@ def export_pdgs_to_graphviz(pdgs: Dict) -> str:
     Returns:
         DOT format string
     """
-    dot = 'digraph PDGs {\n'
-    dot += '  rankdir=TB;\n'
-    dot += '  compound=true;\n'
-    dot += '  node [shape=box];\n\n'
+    parts = []
+    export_pdgs_to_graphviz_stream(pdgs, parts.append)
+    return ''.join(parts)
+
+
+def export_pdgs_to_graphviz_stream(pdgs: Dict, write: Callable[[str], Any]):
+    """
+    Write all PDGs as a single Graphviz DOT graph with subgraphs, piece by piece
+
+    Args:
+        pdgs: Dictionary mapping state_id -> ProgramDependencyGraph
+        write: Callable receiving the DOT text in order (e.g. a file's write
+            method), so that the whole text is never held in memory
+    """
+    write('digraph PDGs {\n'
+          '  rankdir=TB;\n'
+          '  compound=true;\n'
+          '  node [shape=box];\n\n')
 
     for state_id, pdg in sorted(pdgs.items()):
-        dot += f'  subgraph cluster_state_{state_id} {{\n'
-        dot += f'    label="State {state_id}";\n'
-        dot += '    style=dashed;\n'
-        dot += '    color=blue;\n\n'
-
-        # Add nodes
-        for node_id, node in pdg.nodes.items():
-            label = node.statement.replace('"', '\\"').replace('\n', '\\n')
-            color = {
-                'assignment': 'lightblue',
-                'condition': 'lightyellow',
-                'if_block': 'lightgreen'
-            }.get(node.statement_type, 'white')
-
-            dot += f'    s{state_id}_n{node_id} [label="{label}", '
-            dot += f'fillcolor={color}, style=filled];\n'
-
-        # Add edges within this state
-        for edge in pdg.edges:
-            style = 'solid' if edge.edge_type == 'control' else 'dashed'
-            color = 'red' if edge.edge_type == 'control' else 'blue'
-            label = edge.label or edge.variable or ''
-
-            dot += f'    s{state_id}_n{edge.from_node} -> s{state_id}_n{edge.to_node} '
-            dot += f'[style={style}, color={color}, label="{label}"];\n'
-
-        dot += '  }\n\n'
-
-    dot += '}\n'
-    return dot
+        write(f'  subgraph cluster_state_{state_id} {{\n'
+              f'    label="State {state_id}";\n'
+              '    style=dashed;\n'
+              '    color=blue;\n\n')
+        pdg_dot_statements_stream(pdg, write, node_prefix=f's{state_id}_n')
+        write('  }\n\n')
+
+    write('}\n')
 
 
 # ============================================================================
@@ -207,15 +207,14 @@ def run_cli(args_list: Optional[List[str]] = None) -> int:
             # Export Graphviz if requested
             if args.graphviz_output:
                 from . import pdg as pdg_module
-                from .ast_writer import export_pdgs_to_graphviz
+                from .ast_writer import export_pdgs_to_graphviz_stream
 
-                pdgs = pdg_module.build_all_pdgs(
+                pdgs, _ = pdg_module.build_all_pdgs(
                     core.compile_to_ast(source_content, comment_pattern)
                 )
-                dot_output = export_pdgs_to_graphviz(pdgs)
 
                 with open(args.graphviz_output, "w", encoding="utf-8") as dotfile:
-                    dotfile.write(dot_output)
+                    export_pdgs_to_graphviz_stream(pdgs, dotfile.write)
 
                 sys.stderr.write(f"PDG visualization exported to {args.graphviz_output}\n")
 
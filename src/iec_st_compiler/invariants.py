@@ -1,6 +1,6 @@
 import re
-from dataclasses import dataclass, field
-from typing import List, Dict, Optional, Any
+from dataclasses import dataclass, field, InitVar
+from typing import List, Dict, Optional, Any, Set, Tuple
 
 from .pdg import (
     ProgramDependencyGraph,
@@ -9,15 +9,26 @@ from .pdg import (
 )
 
 
-@dataclass
+@dataclass(slots=True)
 class InvariantTemplate:
     """Base class for invariant templates"""
-    id: str
     type: str  # "single", "multi", or "inter"
     state_id: str
     variables: List[str]
     structure: str  # Human-readable template structure
     confidence: float = 1.0  # Confidence score
+    # Identity parts, e.g. ("single", "10", "H_Sensor", "H_Actuator")
+    key: Tuple[str, ...] = field(default=(), kw_only=True)
+    # Rendered identifier, accepted in place of (or as a check of) the key
+    id: InitVar[Optional[str]] = field(default=None, kw_only=True)
+
+    def __post_init__(self, id: Optional[str]):
+        if not self.key:
+            if id is None:
+                raise TypeError(f"{type(self).__name__} needs a key or an id")
+            self.key = (id,)
+        elif id is not None and id != "_".join(self.key):
+            raise ValueError(f"id {id!r} does not match key {self.key!r}")
 
     def to_dict(self) -> dict:
         """Serialize to dictionary for JSON/XML export"""
@@ -31,7 +42,17 @@ class InvariantTemplate:
         }
 
 
-@dataclass
+def _template_id(self) -> str:
+    """String form of the key, rendered only when serializing"""
+    return "_".join(self.key)
+
+
+# Set after the class is built, as the dataclass would otherwise take the
+# property for the default of the init-only id argument
+InvariantTemplate.id = property(_template_id)
+
+
+@dataclass(slots=True)
 class SingleVariableInvariant(InvariantTemplate):
     """
     Single-variable invariant template
@@ -47,18 +68,22 @@ class SingleVariableInvariant(InvariantTemplate):
     actuation_value: Optional[str] = None  # TRUE, FALSE, or numeric value
 
     def to_dict(self) -> dict:
-        base = super().to_dict()
-        base.update({
+        return {
+            "id": self.id,
+            "type": self.type,
+            "state_id": self.state_id,
+            "variables": self.variables,
+            "structure": self.structure,
+            "confidence": self.confidence,
             "sensing_var": self.sensing_var,
             "sensing_var_type": self.sensing_var_type.value,
             "actuation_var": self.actuation_var,
             "operator": self.operator,
             "actuation_value": self.actuation_value
-        })
-        return base
+        }
 
 
-@dataclass
+@dataclass(slots=True)
 class MultiVariableInvariant(InvariantTemplate):
     """
     Multi-variable invariant template
@@ -75,18 +100,22 @@ class MultiVariableInvariant(InvariantTemplate):
     condition_ast: Optional[Any] = None  # Original AST for condition
 
     def to_dict(self) -> dict:
-        base = super().to_dict()
-        base.update({
+        return {
+            "id": self.id,
+            "type": self.type,
+            "state_id": self.state_id,
+            "variables": self.variables,
+            "structure": self.structure,
+            "confidence": self.confidence,
             "sensing_vars": self.sensing_vars,
             "configuration_vars": self.configuration_vars,
             "actuation_var": self.actuation_var,
             "condition": self.condition,
             "action": self.action
-        })
-        return base
+        }
 
 
-@dataclass
+@dataclass(slots=True)
 class InterStateInvariant(InvariantTemplate):
     """
     Interstate invariant template
@@ -104,15 +133,19 @@ class InterStateInvariant(InvariantTemplate):
     condition_variables: List[str] = field(default_factory=list)  # All variables in condition
 
     def to_dict(self) -> dict:
-        base = super().to_dict()
-        base.update({
+        return {
+            "id": self.id,
+            "type": self.type,
+            "state_id": self.state_id,
+            "variables": self.variables,
+            "structure": self.structure,
+            "confidence": self.confidence,
             "source_state": self.source_state,
             "dest_state": self.dest_state,
             "transition_condition": self.transition_condition,
             "state_variable": self.state_variable,
             "condition_variables": self.condition_variables
-        })
-        return base
+        }
 
 class InvariantExtractor:
     """Extracts invariant templates from Program Dependency Graphs"""
@@ -122,6 +155,20 @@ class InvariantExtractor:
         self.state_id = pdg.state_id
         self.state_variable = state_variable
 
+        # Unconditional actuation assignments found by _extract_state_invariants.
+        # Their upstream variables are collected once and shared by every
+        # backward DFS that reaches them.
+        self._dfs_sinks: Set[int] = set()
+        self._sink_variables: Dict[int, Tuple[List[str], List[str]]] = {}
+
+        # Condition text is used by both the interstate walk and the multi-variable
+        # extractor, so the IF/ELSIF prefix is stripped once per condition node
+        self._condition_exprs: Dict[int, str] = {
+            node_id: self._extract_condition_expression(node)
+            for node_id, node in pdg.nodes.items()
+            if node.statement_type == "condition"
+        }
+
     def extract_all_templates(self) -> List[InvariantTemplate]:
         """
         Extract all invariant templates (single, multi-variable, and interstate) from the PDG
@@ -131,8 +178,11 @@ class InvariantExtractor:
         """
         invariants = []
 
+        # Single pass over the nodes: unconditional roots and all actuation nodes
+        state_roots, actuation_nodes = self._classify_nodes()
+
         # 1. Extract state-based invariants (unconditional assignments)
-        state_invs = self._extract_state_invariants()
+        state_invs = self._extract_state_invariants(state_roots)
         invariants.extend(state_invs)
 
         # 2. Extract interstate invariants (transitions)
@@ -141,8 +191,6 @@ class InvariantExtractor:
             invariants.extend(inter_invs)
 
         # 3. Extract condition-based invariants (Actuation Logic)
-        actuation_nodes = self._find_actuation_nodes()
-
         for act_node_id in actuation_nodes:
             act_node = self.pdg.nodes[act_node_id]
             
@@ -154,7 +202,7 @@ class InvariantExtractor:
             if not act_node.variables_written:
                 continue
 
-            act_var = list(act_node.variables_written)[0]
+            act_var = next(iter(act_node.variables_written))
 
             # Extract single-variable invariants
             single_invs = self._extract_single_variable_invariants(act_node_id, act_var)
@@ -189,7 +237,7 @@ class InvariantExtractor:
 
             # Extract the condition (Guard) - UPGRADED LOGIC
             condition_parts = []
-            cond_vars = set()  # Use set to avoid duplicates
+            cond_vars: Dict[str, None] = {}  # Insertion-ordered, avoids duplicates
 
             current_node_id = node_id
 
@@ -205,12 +253,12 @@ class InvariantExtractor:
                 parent_node = self.pdg.nodes[parent_id]
 
                 # Extract that specific condition
-                part_expr = self._extract_condition_expression(parent_node)
+                part_expr = self._condition_expression(parent_id)
                 if part_expr:
                     condition_parts.insert(0, f"({part_expr})")
 
                 # Collect variables from this condition
-                cond_vars.update(parent_node.variables_read)
+                cond_vars.update((var, None) for var in sorted(parent_node.variables_read))
 
                 # Move up to the parent to check for its parent (nested IFs)
                 current_node_id = parent_id
@@ -221,12 +269,12 @@ class InvariantExtractor:
             else:
                 condition_str = "TRUE"
 
-            # Convert set back to list for the template
+            # Convert to list for the template (keeps first-seen order)
             cond_vars_list = list(cond_vars)
 
             # Create the invariant
             inv = InterStateInvariant(
-                id=f"inter_{self.state_id}_to_{target_state}",
+                key=("inter", self.state_id, "to", target_state),
                 type="inter",
                 state_id=self.state_id,
                 variables=[self.state_variable] + cond_vars_list,
@@ -241,23 +289,45 @@ class InvariantExtractor:
 
         return invariants
 
-    def _find_actuation_nodes(self) -> List[int]:
+    def _classify_nodes(self) -> Tuple[List[Tuple[int, str]], List[int]]:
         """
-        Find all nodes that write to actuation variables
+        Classify the nodes that write to actuation variables in a single pass
+
+        An assignment to an actuation variable without control predecessors is an
+        unconditional (state) root; assignments to the state variable are left to
+        the interstate extraction. Every node writing an actuation variable,
+        conditional or not, is also reported as an actuation node.
 
         Returns:
-            List of node IDs
+            Tuple of (list of (node ID, actuation variable) state roots,
+            list of actuation node IDs)
         """
+        state_roots = []
         actuation_nodes = []
 
         for node_id, node in self.pdg.nodes.items():
-            for var in node.variables_written:
-                if var in self.pdg.variables:
-                    if self.pdg.variables[var].var_type == VariableType.ACTUATION:
-                        actuation_nodes.append(node_id)
-                        break
+            actuation_vars = [
+                var for var in sorted(node.variables_written)
+                if var in self.pdg.variables
+                and self.pdg.variables[var].var_type == VariableType.ACTUATION
+            ]
+            if not actuation_vars:
+                continue
+
+            actuation_nodes.append(node_id)
+
+            if node.statement_type != "assignment":
+                continue
+
+            # Skip if this is an assignment to the state variable (handled separately)
+            if self.state_variable and self.state_variable in node.variables_written:
+                continue
 
-        return actuation_nodes
+            # Check if this node has NO control predecessors
+            if not self.pdg.get_predecessors(node_id, edge_type="control"):
+                state_roots.extend((node_id, var) for var in actuation_vars)
+
+        return state_roots, actuation_nodes
 
     def _extract_single_variable_invariants(self, act_node_id: int,
                                             act_var: str) -> List[SingleVariableInvariant]:
@@ -290,7 +360,7 @@ class InvariantExtractor:
                 continue
 
             # Extract sensing variables from the condition
-            for var in cond_node.variables_read:
+            for var in sorted(cond_node.variables_read):
                 if var not in self.pdg.variables:
                     continue
 
@@ -303,7 +373,7 @@ class InvariantExtractor:
 
                     if operator:
                         inv = SingleVariableInvariant(
-                            id=f"single_{self.state_id}_{var}_{act_var}",
+                            key=("single", self.state_id, var, act_var),
                             type="single",
                             state_id=self.state_id,
                             variables=[var, act_var],
@@ -336,38 +406,7 @@ class InvariantExtractor:
 
         # Find all variables that influence this actuation through both
         # control and data dependencies
-        sensing_vars = []
-        config_vars = []
-
-        # DFS backward through the PDG to find all influencing variables
-        visited = set()
-        to_visit = [act_node_id]
-
-        while to_visit:
-            node_id = to_visit.pop()
-            if node_id in visited:
-                continue
-            visited.add(node_id)
-
-            node = self.pdg.nodes[node_id]
-
-            # Collect variables by type
-            for var in node.variables_read:
-                if var not in self.pdg.variables:
-                    continue
-
-                var_obj = self.pdg.variables[var]
-
-                if var_obj.var_type == VariableType.SENSING:
-                    if var not in sensing_vars:
-                        sensing_vars.append(var)
-                elif var_obj.var_type == VariableType.CONFIGURATION:
-                    if var not in config_vars:
-                        config_vars.append(var)
-
-            # Continue traversal backward through edges
-            predecessors = self.pdg.get_predecessors(node_id)
-            to_visit.extend(predecessors)
+        sensing_vars, config_vars = self._collect_influencing_variables(act_node_id)
 
         # Only create invariant if we found sensing or configuration variables
         if not sensing_vars and not config_vars:
@@ -380,7 +419,7 @@ class InvariantExtractor:
 
         if control_predecessors:
             cond_node = self.pdg.nodes[control_predecessors[0]]
-            condition_str = self._extract_condition_expression(cond_node)
+            condition_str = self._condition_expression(cond_node.id)
             condition_ast = cond_node.ast_node
 
         # Extract the action
@@ -391,7 +430,7 @@ class InvariantExtractor:
         structure = f"IF {condition_str} THEN {action_str}"
 
         return MultiVariableInvariant(
-            id=f"multi_{self.state_id}_{act_var}",
+            key=("multi", self.state_id, act_var),
             type="multi",
             state_id=self.state_id,
             variables=all_vars + [act_var],
@@ -404,51 +443,106 @@ class InvariantExtractor:
             condition_ast=condition_ast
         )
 
-    def _extract_state_invariants(self) -> List[InvariantTemplate]:
+    def _collect_influencing_variables(self, start_node_id: int) -> Tuple[List[str], List[str]]:
         """
-        Extract state-based invariants (unconditional assignments in the state)
+        DFS backward through the PDG to find all influencing variables
 
-        These are assignments that happen at the start of a state without conditions.
-        Example: In State 10, PU1_Command = FALSE
+        When the walk reaches an unconditional actuation root (a DFS sink), the
+        root's own upstream variables are merged in instead of walking past it
+        again; they are computed once per root and memoized.
+
+        Args:
+            start_node_id: ID of the node to start the backward walk from
+
+        Returns:
+            Tuple of (sensing variables, configuration variables)
         """
-        invariants = []
+        if start_node_id in self._sink_variables:
+            return self._sink_variables[start_node_id]
 
-        # Find actuation assignments without control dependencies
-        for node_id, node in self.pdg.nodes.items():
-            if node.statement_type != "assignment":
+        sensing_vars = []
+        config_vars = []
+
+        visited = set()
+        to_visit = [start_node_id]
+
+        while to_visit:
+            node_id = to_visit.pop()
+            if node_id in visited:
                 continue
-            
-            # Skip if this is an assignment to the state variable (handled separately)
-            if self.state_variable and self.state_variable in node.variables_written:
+            visited.add(node_id)
+
+            if node_id != start_node_id and node_id in self._dfs_sinks:
+                sink_sensing, sink_config = self._collect_influencing_variables(node_id)
+                for var in sink_sensing:
+                    if var not in sensing_vars:
+                        sensing_vars.append(var)
+                for var in sink_config:
+                    if var not in config_vars:
+                        config_vars.append(var)
                 continue
 
-            # Check if this writes to an actuation variable
-            for var in node.variables_written:
+            node = self.pdg.nodes[node_id]
+
+            # Collect variables by type
+            for var in sorted(node.variables_read):
                 if var not in self.pdg.variables:
                     continue
 
-                if self.pdg.variables[var].var_type == VariableType.ACTUATION:
-                    # Check if this node has NO control predecessors
-                    control_preds = self.pdg.get_predecessors(node_id, edge_type="control")
+                var_obj = self.pdg.variables[var]
 
-                    if not control_preds:
-                        # This is an unconditional actuation assignment
-                        # Extract the value
-                        value = self._extract_actuation_value(node)
+                if var_obj.var_type == VariableType.SENSING:
+                    if var not in sensing_vars:
+                        sensing_vars.append(var)
+                elif var_obj.var_type == VariableType.CONFIGURATION:
+                    if var not in config_vars:
+                        config_vars.append(var)
 
-                        inv = SingleVariableInvariant(
-                            id=f"state_{self.state_id}_{var}",
-                            type="single",
-                            state_id=self.state_id,
-                            variables=[var],
-                            structure=f"In State {self.state_id}, {var} = {value}",
-                            sensing_var="STATE",  # Special marker
-                            sensing_var_type=VariableType.INTERNAL,
-                            actuation_var=var,
-                            operator="=",
-                            actuation_value=value
-                        )
-                        invariants.append(inv)
+            # Continue traversal backward through edges
+            predecessors = self.pdg.get_predecessors(node_id)
+            to_visit.extend(predecessors)
+
+        if start_node_id in self._dfs_sinks:
+            self._sink_variables[start_node_id] = (sensing_vars, config_vars)
+
+        return sensing_vars, config_vars
+
+    def _extract_state_invariants(self, state_roots: List[Tuple[int, str]]) -> List[InvariantTemplate]:
+        """
+        Extract state-based invariants (unconditional assignments in the state)
+
+        These are assignments that happen at the start of a state without conditions.
+        Example: In State 10, PU1_Command = FALSE
+
+        Args:
+            state_roots: (node ID, actuation variable) pairs from _classify_nodes
+
+        Returns:
+            List of SingleVariableInvariant templates
+        """
+        invariants = []
+
+        for node_id, var in state_roots:
+            node = self.pdg.nodes[node_id]
+
+            # This is an unconditional actuation assignment
+            # Extract the value
+            value = self._extract_actuation_value(node)
+
+            inv = SingleVariableInvariant(
+                key=("state", self.state_id, var),
+                type="single",
+                state_id=self.state_id,
+                variables=[var],
+                structure=f"In State {self.state_id}, {var} = {value}",
+                sensing_var="STATE",  # Special marker
+                sensing_var_type=VariableType.INTERNAL,
+                actuation_var=var,
+                operator="=",
+                actuation_value=value
+            )
+            invariants.append(inv)
+            self._dfs_sinks.add(node_id)
 
         return invariants
 
@@ -526,6 +620,22 @@ class InvariantExtractor:
         traverse(cond_node.ast_node)
         return found_operator
 
+    def _condition_expression(self, node_id: int) -> str:
+        """
+        Cached lookup of the condition expression for a node
+
+        Args:
+            node_id: ID of the condition node
+
+        Returns:
+            Condition expression string
+        """
+        expr = self._condition_exprs.get(node_id)
+        if expr is None:
+            expr = self._extract_condition_expression(self.pdg.nodes[node_id])
+            self._condition_exprs[node_id] = expr
+        return expr
+
     @staticmethod
     def _extract_condition_expression(cond_node: PDGNode) -> str:
         """
@@ -1,4 +1,11 @@
 import re
+import sys
+import types
+
+# Pattern types that have no builtin name (the others are str, tuple, list and
+# the marker classes below)
+_T_FUNC = types.FunctionType
+_T_REGEX = re.Pattern
 
 
 class Keyword(str):
@@ -18,19 +25,44 @@ class Code(str):
     pass
 
 
+# Compiled regexes shared by all Ignore patterns: (regex_text, flags) -> re.Pattern
+_REGEX_CACHE = {}
+
+
+def _cached_compile(pattern, flags=0):
+    """
+    Compiles a regex once per process.
+
+    :param pattern: The regular expression string.
+    :param flags: re flags to compile with.
+    :returns: The compiled re.Pattern.
+    """
+    key = (pattern, flags)
+    regex = _REGEX_CACHE.get(key)
+    if regex is None:
+        regex = re.compile(pattern, flags)
+        _REGEX_CACHE[key] = regex
+    return regex
+
+
 class Ignore(object):
     """
     Represents a pattern (typically a regular expression) whose match
     result should be ignored/discarded from the resulting AST.
     """
 
-    def __init__(self, regex_text):
+    def __init__(self, regex_text, flags=0):
         """
         Initializes the Ignore object by compiling the regex.
 
         :param regex_text: The regular expression string to ignore.
+        :param flags: re flags to compile the regex with.
         """
-        self.regex = re.compile(regex_text)
+        self.regex = _cached_compile(regex_text, flags)
+
+
+# Marks a lookahead whose first-character set has not been computed yet
+_NOT_COMPUTED = object()
 
 
 class _And(object):
@@ -46,6 +78,8 @@ class _And(object):
         :param something: The pattern to check.
         """
         self.obj = something
+        # Characters the pattern can start with (None: unknown), computed on first use
+        self.first = _NOT_COMPUTED
 
 
 class _Not(_And):
@@ -57,46 +91,263 @@ class _Not(_And):
     pass
 
 
+class _Sequence(tuple):
+    """
+    Canonical form of a grammar tuple: (quantifier, matcher, pattern) triples.
+
+    Built once when a rule is resolved, so matching a sequence needs no
+    quantifier type checks and no per-element dispatch lookup.
+    """
+
+    pass
+
+
+class _Choice(tuple):
+    """
+    Canonical form of a grammar list: (matcher, pattern) pairs tried in order.
+    """
+
+    pass
+
+
+class _KeywordSet(frozenset):
+    """
+    A run of adjacent Keyword alternatives in a choice, matched as one terminal.
+
+    A keyword only matches when the whole word equals it, so at most one
+    member of the run can match; one word match plus a set lookup decides.
+    """
+
+    pass
+
+
 # Global regex objects and sentinel values
 word_regex = re.compile(r"\w+")
 rest_regex = re.compile(r".*")
 ignoring = Ignore("")
 
+# Leading whitespace, matched in place instead of stripping a copy of the text
+_WS = re.compile(r"\s*")
+
+# Returned by the internal matchers (and memoized) when a pattern does not match
+_FAIL = object()
+
+# Combined whitespace/comment skip regexes: (id(comment), skip_ws) -> (comment, regex or None)
+_skip_cache = {}
+
+# Regex flags that can be scoped to a sub-pattern, with their inline letters
+_SCOPED_FLAGS = ((re.IGNORECASE, "i"), (re.MULTILINE, "m"), (re.DOTALL, "s"), (re.VERBOSE, "x"))
+
 
-def skip(skipper, text, skip_ws=True, skip_comments=None):
+def _first_chars(pattern, active):
     """
-    Skips whitespace and comments at the beginning of the text.
+    Computes the set of characters a pattern match can start with.
 
-    :param skipper: The internal parser instance used for parsing comments.
-    :param text: The text string to process.
-    :param skip_ws: Flag if whitespace should be skipped.
-    :param skip_comments: A function returning a pyPEG pattern for matching comments.
-    :returns: The text after skipping leading whitespace and comments.
+    :param pattern: The pyPEG pattern.
+    :param active: Rule functions currently being examined (recursion guard).
+    :returns: A frozenset of characters, or None if unknown (regexes, patterns
+        that can match empty text, recursive rules).
     """
-    if skip_ws:
-        t = text.strip()
-    else:
-        t = text
+    pattern_type = type(pattern)
+
+    if pattern_type is _T_FUNC:
+        if pattern in active:
+            return None
+        resolved = Parser._resolved_cache.get(pattern) or Parser._resolve(pattern)
+        return _first_chars(resolved[1], active | {pattern})
+    if pattern_type is str or pattern_type is Keyword:
+        return frozenset(pattern[0]) if pattern else None
+    if pattern_type is _KeywordSet:
+        return frozenset(keyword[0] for keyword in pattern) if all(pattern) else None
+    if pattern_type is tuple or pattern_type is _Sequence:
+        if pattern_type is tuple:
+            pattern = Parser._canonicalize(pattern)
+        chars = set()
+        for n, _, p in pattern:
+            first = _first_chars(p, active)
+            if first is None:
+                return None
+            chars |= first
+            if n > 0 or n == -2:
+                return frozenset(chars)
+        return None  # every element is optional
+    if pattern_type is list or pattern_type is _Choice:
+        if pattern_type is list:
+            pattern = Parser._canonicalize(pattern)
+        chars = set()
+        for _, p in pattern:
+            first = _first_chars(p, active)
+            if first is None:
+                return None
+            chars |= first
+        return frozenset(chars)
+    return None
+
+
+def _non_capturing(source):
+    """
+    Rewrites every capturing group of a regex source as a non-capturing one.
 
-    if skip_comments:
-        # Loop until no more comments are found
-        try:
-            while True:
-                # Use the skipper to parse the comment pattern
-                skip_ast, t = skipper.parse_line(t, skip_comments, [], skip_ws, None, 0)
-                if skip_ws:
-                    t = t.strip()
-        except SyntaxError:
-            # Breaks the loop if comment parsing fails (no comment found)
-            pass
+    Capturing groups inside the possessive repetition of a skip regex can make
+    ``re`` fail at match time, and the skipper never reads them anyway.
+
+    :param source: The regex source string.
+    :returns: The equivalent regex source without capturing groups.
+    :raises: ValueError if a construct depends on group numbers or names.
+    """
+    out = []
+    i = 0
+    n = len(source)
+    while i < n:
+        char = source[i]
+        if char == "\\":
+            out.append(source[i:i + 2])
+            i += 2
+        elif char == "[":
+            # Copy the character class; a ']' right after '[' or '[^' is literal
+            j = i + 1
+            if j < n and source[j] == "^":
+                j += 1
+            if j < n and source[j] == "]":
+                j += 1
+            while j < n and source[j] != "]":
+                j += 2 if source[j] == "\\" else 1
+            out.append(source[i:j + 1])
+            i = j + 1
+        elif char == "(":
+            if source.startswith("(?P<", i):
+                end = source.find(">", i)
+                if end < 0:
+                    raise ValueError("unterminated group name")
+                out.append("(?:")
+                i = end + 1
+            elif source.startswith("(?(", i) or source.startswith("(?P=", i):
+                raise ValueError("group references cannot be embedded")
+            elif source.startswith("(?", i):
+                out.append("(?")
+                i += 2
+            else:
+                out.append("(?:")
+                i += 1
+        else:
+            out.append(char)
+            i += 1
+    return "".join(out)
 
-    return t
+
+def _pattern_regex(pattern, skip_ws, active):
+    """
+    Translates a pyPEG pattern into equivalent regex source.
+
+    Every element is wrapped in an atomic group and every quantifier is
+    possessive, so the regex never backtracks into a completed match and
+    behaves exactly like the PEG pattern.
+
+    :param pattern: The pyPEG pattern (as used for comments).
+    :param skip_ws: Flag if whitespace is skipped before each terminal.
+    :param active: Rule functions currently being translated (recursion guard).
+    :returns: The regex source string.
+    :raises: ValueError if the pattern cannot be expressed as a regex.
+    """
+    ws = r"\s*+" if skip_ws else ""
+    pattern_type = type(pattern)
+
+    if pattern_type is _T_FUNC:
+        if pattern in active:
+            raise ValueError("recursive rule")
+        body = pattern()
+        if type(body) is _T_FUNC:
+            body = (body,)
+        return _pattern_regex(body, skip_ws, active | {pattern})
+    if pattern_type is str:
+        return ws + re.escape(pattern)
+    if pattern_type is Keyword:
+        return ws + re.escape(pattern) + r"(?!\w)"
+    if pattern_type is Ignore:
+        pattern, pattern_type = pattern.regex, _T_REGEX
+    if pattern_type is _T_REGEX:
+        if re.search(r"\\[1-9]|\(\?P=", pattern.pattern):
+            raise ValueError("backreferences cannot be embedded")
+        if pattern.flags & re.VERBOSE:
+            raise ValueError("verbose regexes cannot be rewritten")
+        source = _non_capturing(pattern.pattern)
+        flags = pattern.flags & ~re.UNICODE
+        letters = ""
+        for flag, letter in _SCOPED_FLAGS:
+            if flags & flag:
+                letters += letter
+                flags &= ~flag
+        if flags:
+            raise ValueError("regex flags cannot be scoped")
+        if letters:
+            return "%s(?>(?%s:%s))" % (ws, letters, source)
+        return "%s(?>%s)" % (ws, source)
+    if pattern_type is _Not:
+        return "(?!%s)" % _pattern_regex(pattern.obj, skip_ws, active)
+    if pattern_type is _And:
+        return "(?=%s)" % _pattern_regex(pattern.obj, skip_ws, active)
+    if pattern_type is tuple:
+        parts = []
+        n = 1
+        for p in pattern:
+            if p.__class__ is int:
+                n = p
+                continue
+            sub = "(?:%s)" % _pattern_regex(p, skip_ws, active)
+            if n == 1:
+                parts.append(sub)
+            elif n > 1:
+                parts.append("%s{%d}" % (sub, n))
+            elif n == 0:
+                parts.append(sub + "?+")
+            elif n == -1:
+                parts.append(sub + "*+")
+            else:
+                parts.append(sub + "++")
+            n = 1
+        return "(?>%s)" % "".join(parts)
+    if pattern_type is list:
+        return "(?>%s)" % "|".join(_pattern_regex(p, skip_ws, active) for p in pattern)
+    raise ValueError("illegal type in grammar: " + str(pattern_type))
+
+
+def _skip_regex(skip_comments, skip_ws):
+    """
+    Returns a regex skipping any run of whitespace and comments in one match.
+
+    The comment pattern is translated into a regex once and cached; patterns
+    that cannot be translated (e.g. recursive rules) return None and are
+    skipped rule by rule.
+
+    :param skip_comments: The pyPEG pattern for matching comments.
+    :param skip_ws: Flag if whitespace should be skipped as well.
+    :returns: The compiled skip regex, or None if the pattern cannot be folded.
+    """
+    key = (id(skip_comments), skip_ws)
+    entry = _skip_cache.get(key)
+    if entry is not None and entry[0] is skip_comments:
+        return entry[1]
+
+    try:
+        comment = _pattern_regex(skip_comments, skip_ws, frozenset())
+        if skip_ws:
+            skip_re = re.compile(r"(?:\s+|%s)*+" % comment)
+        else:
+            skip_re = re.compile(r"(?:%s)*+" % comment)
+    except (ValueError, re.error):
+        skip_re = None
+
+    _skip_cache[key] = (skip_comments, skip_re)
+    return skip_re
 
 
 class Parser(object):
     """
     The core recursive descent parser engine for pyPEG.
     Manages state and performs the pattern matching recursively.
+
+    The parser works on integer offsets into ``self.source`` instead of slicing
+    the remaining text, so a match never copies the rest of the input.
     """
 
     def __init__(self, another=False):
@@ -106,15 +357,71 @@ class Parser(object):
         :param another: Internal flag; True for the auxiliary skipper parser.
         """
         self.rest_length = -1
+        self.source = ""
+        # End of the parsable text (trailing whitespace excluded when skipping it)
+        self.end = 0
+        # Packrat memo for named rules: (id(rule), pos) -> (AST delta, new_pos) or _FAIL
+        self.memo = {}
         # The parser owns a reference to an internal 'skipper' parser used for comments
         if not another:
             self.skipper = Parser(True)
         else:
             self.skipper = self
 
+    def set_source(self, source, skip_ws=True):
+        """
+        Sets the text to parse and resets the per-source state.
+
+        :param source: The complete text to parse.
+        :param skip_ws: Flag if whitespace should be skipped; trailing whitespace
+            is then excluded from the parsable range.
+        """
+        end = len(source.rstrip()) if skip_ws else len(source)
+        for parser in (self, self.skipper):
+            parser.source = source
+            parser.end = end
+            parser.rest_length = -1
+            parser.memo.clear()
+
+    def skip(self, pos, skip_ws=True, skip_comments=None):
+        """
+        Skips whitespace and comments starting at the given offset.
+
+        :param pos: Offset into the source.
+        :param skip_ws: Flag if whitespace should be skipped.
+        :param skip_comments: A pyPEG pattern for matching comments.
+        :returns: The offset of the first character after whitespace and comments.
+        """
+        if skip_comments:
+            skip_re = _skip_regex(skip_comments, skip_ws)
+            if skip_re is not None:
+                try:
+                    return skip_re.match(self.source, pos, self.end).end()
+                except (SystemError, re.error):
+                    # The regex engine rejected the combined regex; skip this
+                    # pattern rule by rule from now on
+                    _skip_cache[(id(skip_comments), skip_ws)] = (skip_comments, None)
+
+        if skip_ws:
+            pos = _WS.match(self.source, pos, self.end).end()
+
+        if skip_comments:
+            # Fallback for comment patterns without a regex translation:
+            # loop until no more comments are found
+            while True:
+                # Use the skipper to parse the comment pattern
+                matched = self.skipper._parse(pos, skip_comments, [], skip_ws, None, 0)
+                if matched is _FAIL:
+                    break
+                pos = matched[1]
+                if skip_ws:
+                    pos = _WS.match(self.source, pos, self.end).end()
+
+        return pos
+
     def parse_line(
         self,
-        text_line,
+        pos,
         pattern,
         result_so_far=None,
         skip_ws=True,
@@ -122,212 +429,431 @@ class Parser(object):
         input_length=0,
     ):
         """
-        Parses a single line of text against a pyPEG pattern recursively.
+        Parses the source at the given offset against a pyPEG pattern recursively.
 
-        :param text_line: The text to parse.
+        :param pos: Offset into the source where parsing starts.
         :param pattern: The pyPEG language description (function, string, tuple, or list).
         :param result_so_far: The parsing result accumulated so far (list of AST nodes).
         :param skip_ws: Flag if whitespace should be skipped.
         :param skip_comments: Python function returning pyPEG for matching comments.
         :param input_length: Original length of text (used for position tracking).
-        :returns: (pyAST, text_rest) - The updated AST and the remaining unparsed text.
+        :returns: (pyAST, new_pos) - The updated AST and the offset after the match.
         :raises: SyntaxError if the text does not match the pattern.
         """
         if result_so_far is None:
             result_so_far = []
-        name = None
-        position = 0
+        matched = self._parse(
+            pos, pattern, result_so_far, skip_ws, skip_comments, input_length
+        )
+        if matched is _FAIL:
+            if type(pattern) not in self._dispatch:
+                raise SyntaxError("illegal type in grammar: " + str(type(pattern)))
+            raise SyntaxError()
+        return matched
 
-        # Inner helper function to finalize the result (r = result_builder)
-        def r(_result, _text):
-            """Handles packaging the match result into the final AST structure."""
+    def _parse(self, pos, pattern, result_so_far, skip_ws, skip_comments, input_length):
+        """
+        Internal worker of parse_line; failures are returned, not raised.
 
-            # Track the minimum remaining text length for error reporting
-            if self.rest_length == -1:
-                self.rest_length = len(_text)
-            else:
-                self.rest_length = min(self.rest_length, len(_text))
+        Backtracking happens on nearly every token, so the matchers signal a
+        mismatch with the _FAIL sentinel instead of a costly exception.
 
-            res = result_so_far
+        :returns: (pyAST, new_pos), or _FAIL if the text does not match.
+        """
+        return self._dispatch.get(type(pattern), Parser._match_illegal)(
+            self, pos, pattern, None, result_so_far, skip_ws, skip_comments, input_length
+        )
 
-            # Non-terminal rule with a result: create a node (name, result)
-            if name and _result:
-                if input_length:
-                    res.append(position)
-                res.append((name, _result))
-            # Non-terminal rule that matched empty or only literals: create an empty node
-            elif name:
+    def _result(self, name, result_so_far, _result, pos, start, input_length):
+        """
+        Packages a match result into the final AST structure.
+
+        :param name: Rule name to wrap the result in, or None for anonymous patterns.
+        :param result_so_far: The AST list the result is added to.
+        :param _result: The matched value (string, list of nodes, or None).
+        :param pos: Offset after the match.
+        :param start: Offset where the match began (after skipping).
+        :param input_length: Original length of text (used for position tracking).
+        :returns: (pyAST, new_pos)
+        """
+        end = self.end
+
+        # Track the minimum remaining text length for error reporting (measured
+        # before skipping trailing whitespace/comments; parse() skips it once)
+        if self.rest_length == -1:
+            self.rest_length = end - pos
+        else:
+            self.rest_length = min(self.rest_length, end - pos)
+
+        res = result_so_far
+
+        # Non-terminal rule with a result: create a node (name, result)
+        if name and _result:
+            if input_length:
+                res.append(input_length - (end - start) - 1)
+            res.append((name, _result))
+        # Non-terminal rule that matched empty or only literals: create an empty node
+        elif name:
+            if input_length:
+                res.append(input_length - (end - start) - 1)
+            res.append((name, []))
+        # Terminal/Sequence/Loop result: extend the existing list
+        elif _result:
+            # Check if the result is already a list (e.g., from Sequence or loops)
+            if type(_result) is list:
+                res.extend(_result)
+            else:
                 if input_length:
-                    res.append(position)
-                res.append((name, []))
-            # Terminal/Sequence/Loop result: extend the existing list
-            elif _result:
-                # Check if the result is already a list (e.g., from Sequence or loops)
-                if type(_result) is type([]):
-                    res.extend(_result)
-                else:
-                    if input_length:
-                        res.append(position)
-                    res.extend([_result])
+                    res.append(input_length - (end - start) - 1)
+                res.extend([_result])
 
-            return res, _text
+        return res, pos
 
-        # 1. Lazy evaluation and naming (if pattern is a function)
-        if type(pattern) is type(lambda x: 0):
-            if pattern.__name__[0] != "_":
-                name = pattern.__name__
-            pattern = pattern()
-            if type(pattern) is type(lambda x: 0):
-                pattern = (pattern,)
+    # Rule function -> (name or None, resolved body), shared by all parsers.
+    # Grammar functions are stateless, so each body is built once per process.
+    _resolved_cache = {}
 
-        # 2. Skip initial comments and whitespace
-        text = skip(self.skipper, text_line, skip_ws, skip_comments)
+    @staticmethod
+    def _resolve(rule):
+        """
+        Evaluates a rule function and caches its name and body.
+
+        :param rule: The grammar rule function.
+        :returns: (name, body) - The rule name (None for '_'-prefixed helpers) and its pattern.
+        """
+        # Names are interned so that node types compare by identity
+        name = sys.intern(rule.__name__) if rule.__name__[0] != "_" else None
+        body = rule()
+        if type(body) is _T_FUNC:
+            body = (body,)
+        resolved = (name, Parser._canonicalize(body))
+        Parser._resolved_cache[rule] = resolved
+        return resolved
+
+    @staticmethod
+    def _canonicalize(pattern):
+        """
+        Rewrites the tuples of a rule body into _Sequence objects.
 
-        if input_length:
-            position = input_length - len(text) - 1
+        Quantifiers are folded into the element they apply to (default 1) and
+        each element is paired with its matcher; lists become _Choice objects
+        pairing each alternative with its matcher. Rule functions stay lazy.
 
+        :param pattern: A resolved pyPEG pattern.
+        :returns: The equivalent pattern with canonical sequences.
+        """
         pattern_type = type(pattern)
+        if pattern_type is tuple:
+            triples = []
+            n = 1
+            for p in pattern:
+                if p.__class__ is int:
+                    n = p
+                else:
+                    p = Parser._canonicalize(p)
+                    matcher = Parser._dispatch.get(type(p), Parser._match_illegal)
+                    triples.append((n, matcher, p))
+                    n = 1
+            return _Sequence(triples)
+        if pattern_type is list:
+            # Merge runs of adjacent keywords; only adjacent ones, as any other
+            # alternative in between must still be tried in order
+            alternatives = []
+            for p in pattern:
+                if type(p) is Keyword and alternatives and type(alternatives[-1]) is list:
+                    alternatives[-1].append(p)
+                elif type(p) is Keyword:
+                    alternatives.append([p])
+                else:
+                    alternatives.append(Parser._canonicalize(p))
 
-        # 3. Pattern Matching Logic
+            pairs = []
+            for p in alternatives:
+                if type(p) is list:
+                    p = p[0] if len(p) == 1 else _KeywordSet(p)
+                pairs.append((Parser._dispatch.get(type(p), Parser._match_illegal), p))
+            return _Choice(pairs)
+        return pattern
 
-        # 3a. String Literal Match
-        if pattern_type is type(""):
-            if text[: len(pattern)] == pattern:
-                text = skip(self.skipper, text[len(pattern) :], skip_ws, skip_comments)
-                return r(None, text)
+    # --- Pattern matchers, selected by type(pattern) through _dispatch ---
+
+    def _match_func(
+        self, pos, pattern, name, result_so_far, skip_ws, skip_comments, input_length
+    ):
+        """Lazy evaluation and naming of a rule function; named rules are memoized."""
+        resolved = Parser._resolved_cache.get(pattern)
+        if resolved is None:
+            resolved = Parser._resolve(pattern)
+        name, body = resolved
+
+        if name is None:
+            return self._dispatch.get(type(body), Parser._match_illegal)(
+                self, pos, body, None, result_so_far, skip_ws, skip_comments, input_length
+            )
+
+        # Named rules are memoized so backtracking never re-parses them
+        memo_key = (id(pattern), pos)
+        cached = self.memo.get(memo_key)
+        if cached is _FAIL:
+            return _FAIL
+        if cached is not None:
+            result_so_far.extend(cached[0])
+            return result_so_far, cached[1]
+
+        start = len(result_so_far)
+        matched = self._dispatch.get(type(body), Parser._match_illegal)(
+            self, pos, body, name, result_so_far, skip_ws, skip_comments, input_length
+        )
+        if matched is _FAIL:
+            self.memo[memo_key] = _FAIL
+            return _FAIL
+        result, new_pos = matched
+        self.memo[memo_key] = (result[start:], new_pos)
+        return matched
+
+    def _match_str(
+        self, pos, pattern, name, result_so_far, skip_ws, skip_comments, input_length
+    ):
+        """String literal match."""
+        pos = self.skip(pos, skip_ws, skip_comments)
+        if self.source.startswith(pattern, pos, self.end):
+            new_pos = pos + len(pattern)
+            return self._result(name, result_so_far, None, new_pos, pos, input_length)
+        return _FAIL
+
+    def _match_keyword(
+        self, pos, pattern, name, result_so_far, skip_ws, skip_comments, input_length
+    ):
+        """Keyword match (checks word boundary)."""
+        pos = self.skip(pos, skip_ws, skip_comments)
+        m = word_regex.match(self.source, pos, self.end)
+        if m and m.group(0) == pattern:
+            new_pos = pos + len(pattern)
+            return self._result(name, result_so_far, None, new_pos, pos, input_length)
+        return _FAIL
+
+    def _match_keyword_set(
+        self, pos, pattern, name, result_so_far, skip_ws, skip_comments, input_length
+    ):
+        """Match of any keyword in a _KeywordSet (checks word boundary)."""
+        pos = self.skip(pos, skip_ws, skip_comments)
+        m = word_regex.match(self.source, pos, self.end)
+        if m and m.group(0) in pattern:
+            new_pos = m.end()
+            return self._result(name, result_so_far, None, new_pos, pos, input_length)
+        return _FAIL
+
+    def _match_not(
+        self, pos, pattern, name, result_so_far, skip_ws, skip_comments, input_length
+    ):
+        """Negative lookahead: succeeds without consuming input if the inner pattern fails."""
+        inner_pos = self.skip(pos, skip_ws, skip_comments)
+        first = pattern.first
+        if first is _NOT_COMPUTED:
+            first = pattern.first = _first_chars(pattern.obj, frozenset())
+        if first is not None and (
+            inner_pos >= self.end or self.source[inner_pos] not in first
+        ):
+            # The inner pattern cannot start here, so it cannot match
+            return result_so_far, pos
+
+        # Attempt to parse the inner object
+        if self._parse(inner_pos, pattern.obj, [], skip_ws, skip_comments, input_length) is _FAIL:
+            # Success: Inner object did NOT match, return original offset
+            return result_so_far, pos
+
+        # Failure: Inner object matched
+        return _FAIL
+
+    def _match_and(
+        self, pos, pattern, name, result_so_far, skip_ws, skip_comments, input_length
+    ):
+        """Positive lookahead: checks the inner pattern without consuming input."""
+        inner_pos = self.skip(pos, skip_ws, skip_comments)
+        first = pattern.first
+        if first is _NOT_COMPUTED:
+            first = pattern.first = _first_chars(pattern.obj, frozenset())
+        if first is not None and (
+            inner_pos >= self.end or self.source[inner_pos] not in first
+        ):
+            return _FAIL
+        if self._parse(inner_pos, pattern.obj, [], skip_ws, skip_comments, input_length) is _FAIL:
+            return _FAIL
+        return result_so_far, pos
+
+    def _match_regex(
+        self, pos, pattern, name, result_so_far, skip_ws, skip_comments, input_length
+    ):
+        """Regex match; the matched string becomes a terminal in the AST."""
+        pos = self.skip(pos, skip_ws, skip_comments)
+        m = pattern.match(self.source, pos, self.end)
+        if m:
+            new_pos = m.end()
+            return self._result(
+                name, result_so_far, m.group(0), new_pos, pos, input_length
+            )
+        return _FAIL
+
+    def _match_ignore(
+        self, pos, pattern, name, result_so_far, skip_ws, skip_comments, input_length
+    ):
+        """Ignore match; the matched text is discarded from the AST."""
+        pos = self.skip(pos, skip_ws, skip_comments)
+        m = pattern.regex.match(self.source, pos, self.end)
+        if m:
+            new_pos = m.end()
+            return self._result(name, result_so_far, None, new_pos, pos, input_length)
+        return _FAIL
+
+    def _match_tuple(
+        self, pos, pattern, name, result_so_far, skip_ws, skip_comments, input_length
+    ):
+        """Sequence match with quantifiers (-2, -1, 0, 1, 2, ...) before elements."""
+        pos = self.skip(pos, skip_ws, skip_comments)
+        start = pos
+        result = []
+        n = 1  # Current quantifier (-2, -1, 0, 1, 2, ...)
+        for p in pattern:
+            # Quantifier definition (must be an int)
+            if p.__class__ is int:
+                n = p
             else:
-                raise SyntaxError()
-
-        # 3b. Keyword Match (checks word boundary)
-        elif pattern_type is type(Keyword("")):
-            m = word_regex.match(text)
-            if m:
-                if m.group(0) == pattern:
-                    text = skip(
-                        self.skipper,
-                        text[len(pattern) :],
-                        skip_ws,
-                        skip_comments,
+                if n > 0:
+                    # Required or Fixed Repetition (n times)
+                    for _ in range(n):
+                        matched = self._parse(
+                            pos, p, result, skip_ws, skip_comments, input_length
+                        )
+                        if matched is _FAIL:
+                            return _FAIL
+                        result, pos = matched
+                elif n == 0:
+                    # Optional Repetition (0 or 1 time)
+                    matched = self._parse(
+                        pos, p, result, skip_ws, skip_comments, input_length
                     )
-                    return r(None, text)
-                else:
-                    raise SyntaxError()
-            else:
-                raise SyntaxError()
-
-        # 3c. Not Match (Negative Lookahead)
-        elif pattern_type is type(_Not("")):
-            try:
-                # Attempt to parse the inner object
-                self.parse_line(
-                    text, pattern.obj, [], skip_ws, skip_comments, input_length
+                    if matched is not _FAIL:
+                        result, pos = matched
+                elif n < 0:
+                    # ZeroOrMore (-1) or OneOrMore (-2) Loop
+                    found = False
+                    while True:
+                        matched = self._parse(
+                            pos, p, result, skip_ws, skip_comments, input_length
+                        )
+                        if matched is _FAIL:
+                            break  # Loop terminates when parse fails
+                        result, pos = matched
+                        found = True
+
+                    # OneOrMore (-2) failed if nothing was found
+                    if n == -2 and not found:
+                        return _FAIL
+                n = 1  # Reset quantifier for the next pattern
+        return self._result(name, result_so_far, result, pos, start, input_length)
+
+    def _match_sequence(
+        self, pos, pattern, name, result_so_far, skip_ws, skip_comments, input_length
+    ):
+        """Sequence match over a canonical _Sequence of (n, matcher, pattern) triples."""
+        pos = self.skip(pos, skip_ws, skip_comments)
+        start = pos
+        result = []
+        for n, match, p in pattern:
+            if n == 1:
+                matched = match(
+                    self, pos, p, None, result, skip_ws, skip_comments, input_length
                 )
-            except SyntaxError:
-                # Success: Inner object did NOT match, return original text
-                return result_so_far, text_line
-
-            # Failure: Inner object matched, raise error
-            raise SyntaxError()
-
-        # 3d. And Match (Positive Lookahead)
-        elif pattern_type is type(_And("")):
-            # Parse the inner object
-            self.parse_line(text, pattern.obj, [], skip_ws, skip_comments, input_length)
-            # Success: return original results and text (consumes nothing)
-            return result_so_far, text_line
-
-        # 3e. Regex or Ignore Match
-        elif pattern_type is type(word_regex) or pattern_type is type(ignoring):
-            if pattern_type is type(ignoring):
-                pattern = pattern.regex
-
-            m = pattern.match(text)
-            if m:
-                text = skip(
-                    self.skipper, text[len(m.group(0)) :], skip_ws, skip_comments
+                if matched is _FAIL:
+                    return _FAIL
+                result, pos = matched
+            elif n > 0:
+                # Fixed Repetition (n times)
+                for _ in range(n):
+                    matched = match(
+                        self, pos, p, None, result, skip_ws, skip_comments, input_length
+                    )
+                    if matched is _FAIL:
+                        return _FAIL
+                    result, pos = matched
+            elif n == 0:
+                # Optional Repetition (0 or 1 time)
+                matched = match(
+                    self, pos, p, None, result, skip_ws, skip_comments, input_length
                 )
-                if pattern_type is type(ignoring):
-                    return r(None, text)  # Ignore match result
-                else:
-                    return r(m.group(0), text)  # Return the matched string
+                if matched is not _FAIL:
+                    result, pos = matched
             else:
-                raise SyntaxError()
-
-        # 3f. Sequence/Quantifier Match (Tuple)
-        elif pattern_type is type((None,)):
-            result = []
-            n = 1  # Current quantifier (-2, -1, 0, 1, 2, ...)
-            for p in pattern:
-                # Quantifier definition (must be type(0))
-                if type(p) is type(0):
-                    n = p
-                else:
-                    if n > 0:
-                        # Required or Fixed Repetition (n times)
-                        for _ in range(n):
-                            result, text = self.parse_line(
-                                text, p, result, skip_ws, skip_comments, input_length
-                            )
-                    elif n == 0:
-                        # Optional Repetition (0 or 1 time)
-                        try:
-                            new_result, new_text = self.parse_line(
-                                text, p, result, skip_ws, skip_comments, input_length
-                            )
-                            result, text = new_result, new_text
-                        except SyntaxError:
-                            pass  # Optional failed, continue with old result/text
-                    elif n < 0:
-                        # ZeroOrMore (-1) or OneOrMore (-2) Loop
-                        found = False
-                        while True:
-                            try:
-                                new_result, new_text = self.parse_line(
-                                    text,
-                                    p,
-                                    result,
-                                    skip_ws,
-                                    skip_comments,
-                                    input_length,
-                                )
-                                result, text, found = new_result, new_text, True
-                            except SyntaxError:
-                                break  # Loop terminates when parse fails
-
-                        # OneOrMore (-2) failed if nothing was found
-                        if n == -2 and not found:
-                            raise SyntaxError()
-                    n = 1  # Reset quantifier for the next pattern
-            return r(result, text)
-
-        # 3g. Choice Match (List)
-        elif pattern_type is type([]):
-            result = []
-            found = False
-            for p in pattern:
-                try:
-                    # Attempt to parse with the current choice pattern
-                    result, text = self.parse_line(
-                        text, p, result, skip_ws, skip_comments, input_length
+                # ZeroOrMore (-1) or OneOrMore (-2) Loop
+                found = False
+                while True:
+                    matched = match(
+                        self, pos, p, None, result, skip_ws, skip_comments, input_length
                     )
+                    if matched is _FAIL:
+                        break
+                    result, pos = matched
                     found = True
-                except SyntaxError:
-                    pass
-                if found:
-                    break  # Success, stop checking choices
 
-            if found:
-                return r(result, text)
-            else:
-                raise SyntaxError()
+                # OneOrMore (-2) failed if nothing was found
+                if n == -2 and not found:
+                    return _FAIL
+        return self._result(name, result_so_far, result, pos, start, input_length)
 
-        # 3h. Illegal Pattern
-        else:
-            raise SyntaxError("illegal type in grammar: " + str(pattern_type))
+    def _match_choice(
+        self, pos, pattern, name, result_so_far, skip_ws, skip_comments, input_length
+    ):
+        """Ordered choice: the first alternative that matches wins."""
+        pos = self.skip(pos, skip_ws, skip_comments)
+        for p in pattern:
+            # Attempt to parse with the current choice pattern
+            matched = self._parse(pos, p, [], skip_ws, skip_comments, input_length)
+            if matched is not _FAIL:
+                return self._result(
+                    name, result_so_far, matched[0], matched[1], pos, input_length
+                )
+        return _FAIL
+
+    def _match_alternatives(
+        self, pos, pattern, name, result_so_far, skip_ws, skip_comments, input_length
+    ):
+        """Ordered choice over a canonical _Choice of (matcher, pattern) pairs."""
+        pos = self.skip(pos, skip_ws, skip_comments)
+        for match, p in pattern:
+            matched = match(self, pos, p, None, [], skip_ws, skip_comments, input_length)
+            if matched is not _FAIL:
+                return self._result(
+                    name, result_so_far, matched[0], matched[1], pos, input_length
+                )
+        return _FAIL
+
+    def _match_illegal(
+        self, pos, pattern, name, result_so_far, skip_ws, skip_comments, input_length
+    ):
+        """Rejects pattern types the grammar language does not define."""
+        return _FAIL
+
+    _dispatch = {
+        _T_FUNC: _match_func,
+        str: _match_str,
+        Keyword: _match_keyword,
+        _KeywordSet: _match_keyword_set,
+        _Not: _match_not,
+        _And: _match_and,
+        _T_REGEX: _match_regex,
+        Ignore: _match_ignore,
+        tuple: _match_tuple,
+        _Sequence: _match_sequence,
+        list: _match_choice,
+        _Choice: _match_alternatives,
+    }
 
 
 # --- Plain Module API ---
 
+# Parser reused by the module-level parse_line; create a Parser() for an isolated instance
+_default_parser = None
+
 
 def parse_line(
     text_line,
@@ -340,7 +866,9 @@ def parse_line(
     """
     Parses a single line of text against a pyPEG pattern.
 
-    This function initializes a new Parser instance for a single operation.
+    This function reuses a shared module-level Parser, resetting it for every
+    call, and is therefore not thread-safe; use Parser() directly for
+    isolated instances.
 
     :param text_line: Text to parse.
     :param pattern: pyPEG language description.
@@ -350,20 +878,24 @@ def parse_line(
     :param output_pos: Flag whether to insert position information into the pyAST.
     :returns: (pyAST, text_rest) - The resulting AST and the remaining unparsed text.
     """
+    global _default_parser
     if result_so_far is None:
         result_so_far = []
-    p = Parser()
+    if _default_parser is None:
+        _default_parser = Parser()
+    p = _default_parser
+    p.set_source(text_line, skip_ws)
     if output_pos:
         length = len(text_line)
     else:
         length = 0
 
-    text = skip(p.skipper, text_line, skip_ws, skip_comments)
-    ast, text = p.parse_line(
-        text, pattern, result_so_far, skip_ws, skip_comments, length
-    )
+    pos = p.skip(0, skip_ws, skip_comments)
+    ast, pos = p.parse_line(pos, pattern, result_so_far, skip_ws, skip_comments, length)
+    # Matches end right after their token; skip what trails the last one
+    pos = p.skip(pos, skip_ws, skip_comments)
 
-    return ast, text
+    return ast, text_line[pos : p.end]
 
 
 def parse(language, line_source, skip_ws=True, skip_comments=None, output_pos=False):
@@ -382,33 +914,39 @@ def parse(language, line_source, skip_ws=True, skip_comments=None, output_pos=Fa
     p = None  # Initialize p in the outer scope to avoid the shadowing warning
 
     # Resolve lazy top-level language function if necessary
-    while type(language) is type(lambda x: 0):
+    while type(language) is _T_FUNC:
         language = language()
 
     # Concatenate all input lines into a single string
-    orig = ""
+    chunks = []
     ld = 0
+    offset = 0
     for line in line_source:
         if line_source.isfirstline():
             ld = 1
         else:
             ld += 1
-        lines.append((len(orig), ld))
-        orig += line
+        lines.append((offset, ld))
+        offset += len(line)
+        chunks.append(line)
+    orig = "".join(chunks)
     text_len = len(orig)
 
     try:
         p = Parser()
+        p.set_source(orig, skip_ws)
         if output_pos:
             length = len(orig)
         else:
             length = 0
 
-        text = skip(p.skipper, orig, skip_ws, skip_comments)
-        result, text = p.parse_line(text, language, [], skip_ws, skip_comments, length)
+        pos = p.skip(0, skip_ws, skip_comments)
+        result, pos = p.parse_line(pos, language, [], skip_ws, skip_comments, length)
+        # Matches end right after their token; skip what trails the last one
+        pos = p.skip(pos, skip_ws, skip_comments)
 
         # Final check: did we consume all non-whitespace/comment text?
-        if text:
+        if pos < p.end:
             raise SyntaxError()
         text_len = 0
 
@@ -417,8 +955,12 @@ def parse(language, line_source, skip_ws=True, skip_comments=None, output_pos=Fa
         if p is None:
             raise  # Re-raise if parser wasn't even initialized
 
-        # Calculate error position for reporting using p.rest_length
-        parsed = text_len - p.rest_length
+        # Calculate error position for reporting using p.rest_length, counting
+        # the whitespace/comments after the furthest match as parsed
+        rest_length = p.rest_length
+        if rest_length != -1:
+            rest_length = p.end - p.skip(p.end - rest_length, skip_ws, skip_comments)
+        parsed = text_len - rest_length
 
         for n, ld in lines:
             if n >= parsed:
@@ -11,10 +11,14 @@ Key Components:
 - PDG construction per state (case element)
 """
 
-from dataclasses import dataclass, field
-from typing import Set, Dict, List, Optional, Tuple, Any
+from dataclasses import dataclass
+from typing import Set, FrozenSet, Dict, List, Optional, Tuple, Any, Callable, Iterable, Iterator, TextIO
 from enum import Enum
+from bisect import bisect_left, insort
+from weakref import WeakKeyDictionary
+import json
 import re
+import sys
 
 
 # ============================================================================
@@ -30,7 +34,7 @@ class VariableType(Enum):
     INTERNAL = "internal"  # Internal state/logic variables
 
 
-@dataclass
+@dataclass(slots=True)
 class Variable:
     """Represents a PLC program variable with its classification"""
     name: str
@@ -39,6 +43,9 @@ class Variable:
     scope: str  # "input", "output", "var", "var_temp"
     initial_value: Optional[str] = None
 
+    def __post_init__(self):
+        self.name = sys.intern(self.name)
+
     def __hash__(self):
         return hash(self.name)
 
@@ -48,22 +55,38 @@ class Variable:
         return self.name == other.name
 
 
-@dataclass
+_EMPTY: FrozenSet[str] = frozenset()
+
+
+def _intern_names(names: Optional[Iterable[str]]) -> FrozenSet[str]:
+    """Return a frozenset of the interned variable names (frozensets as is)"""
+    if not names:
+        return _EMPTY
+    if type(names) is frozenset:
+        return names
+    return frozenset(map(sys.intern, names))
+
+
+@dataclass(slots=True)
 class PDGNode:
     """Represents a statement node in the Program Dependency Graph"""
     id: int
     statement: str  # Human-readable statement
     statement_type: str  # "assignment", "condition", "if_block"
-    variables_read: Set[str] = field(default_factory=set)
-    variables_written: Set[str] = field(default_factory=set)
+    variables_read: FrozenSet[str] = _EMPTY
+    variables_written: FrozenSet[str] = _EMPTY
     ast_node: Optional[Any] = None  # Reference to original AST node
     line_number: Optional[int] = None
 
+    def __post_init__(self):
+        self.variables_read = _intern_names(self.variables_read)
+        self.variables_written = _intern_names(self.variables_written)
+
     def __hash__(self):
         return hash(self.id)
 
 
-@dataclass
+@dataclass(slots=True)
 class PDGEdge:
     """Represents a dependency edge in the PDG"""
     from_node: int
@@ -72,6 +95,10 @@ class PDGEdge:
     variable: Optional[str] = None  # For data edges, which variable creates dependency
     label: Optional[str] = None  # Human-readable label
 
+    def __post_init__(self):
+        if self.variable:
+            self.variable = sys.intern(self.variable)
+
 
 class ProgramDependencyGraph:
     """Complete Program Dependency Graph for a single state"""
@@ -79,18 +106,63 @@ class ProgramDependencyGraph:
     def __init__(self, state_id: str):
         self.state_id = state_id
         self.nodes: Dict[int, PDGNode] = {}
+        # Adjacency indexes (node_id -> incident edges, in edge order)
+        self._succ: Dict[int, List[PDGEdge]] = {}
+        self._pred: Dict[int, List[PDGEdge]] = {}
+        # Writer index (variable -> sorted IDs of the nodes writing it)
+        self._writers: Dict[str, List[int]] = {}
+        # Bumped by every mutator, so renderings can tell the graph changed
+        self._version: int = 0
         self.edges: List[PDGEdge] = []
         self.variables: Dict[str, Variable] = {}
         self.next_node_id: int = 0
 
+    @property
+    def edges(self) -> List[PDGEdge]:
+        """All edges in insertion order (use add_edge to extend)"""
+        return self._edges
+
+    @edges.setter
+    def edges(self, edges: List[PDGEdge]):
+        """Replace the edge list and rebuild the adjacency indexes"""
+        self._version += 1
+        self._edges = edges
+        self._succ = {}
+        self._pred = {}
+        for edge in edges:
+            self._succ.setdefault(edge.from_node, []).append(edge)
+            self._pred.setdefault(edge.to_node, []).append(edge)
+
     def add_node(self, node: PDGNode) -> int:
         """Add a node to the PDG and return its ID"""
+        self._version += 1
         self.nodes[node.id] = node
+        for var in node.variables_written:
+            writers = self._writers.setdefault(var, [])
+            # IDs are normally assigned in increasing order, so this appends
+            if not writers or writers[-1] < node.id:
+                writers.append(node.id)
+            else:
+                insort(writers, node.id)
         return node.id
 
     def add_edge(self, edge: PDGEdge):
         """Add an edge to the PDG"""
-        self.edges.append(edge)
+        self._version += 1
+        self._edges.append(edge)
+        self._succ.setdefault(edge.from_node, []).append(edge)
+        self._pred.setdefault(edge.to_node, []).append(edge)
+
+    def add_edges(self, edges: Iterable[PDGEdge]):
+        """Add several edges to the PDG at once, in order"""
+        self._version += 1
+        start = len(self._edges)
+        self._edges.extend(edges)
+        succ = self._succ
+        pred = self._pred
+        for edge in self._edges[start:]:
+            succ.setdefault(edge.from_node, []).append(edge)
+            pred.setdefault(edge.to_node, []).append(edge)
 
     def create_node(self, statement: str, stmt_type: str,
                     reads: Set[str] = None, writes: Set[str] = None,
@@ -100,8 +172,8 @@ class ProgramDependencyGraph:
             id=self.next_node_id,
             statement=statement,
             statement_type=stmt_type,
-            variables_read=reads or set(),
-            variables_written=writes or set(),
+            variables_read=reads,
+            variables_written=writes,
             ast_node=ast_node
         )
         self.next_node_id += 1
@@ -110,74 +182,132 @@ class ProgramDependencyGraph:
 
     def get_predecessors(self, node_id: int, edge_type: Optional[str] = None) -> List[int]:
         """Get all predecessor nodes (nodes with edges pointing to this node)"""
-        predecessors = []
-        for edge in self.edges:
-            if edge.to_node == node_id:
-                if edge_type is None or edge.edge_type == edge_type:
-                    predecessors.append(edge.from_node)
-        return predecessors
+        return [
+            edge.from_node for edge in self._pred.get(node_id, ())
+            if edge_type is None or edge.edge_type == edge_type
+        ]
 
     def get_successors(self, node_id: int, edge_type: Optional[str] = None) -> List[int]:
         """Get all successor nodes (nodes this node points to)"""
-        successors = []
-        for edge in self.edges:
-            if edge.from_node == node_id:
-                if edge_type is None or edge.edge_type == edge_type:
-                    successors.append(edge.to_node)
-        return successors
+        return [
+            edge.to_node for edge in self._succ.get(node_id, ())
+            if edge_type is None or edge.edge_type == edge_type
+        ]
 
     def find_defining_node(self, variable: str, before_node: Optional[int] = None) -> Optional[int]:
         """Find the most recent node that defines (writes to) a variable"""
-        # Search backwards from before_node
-        candidates = []
-        for node_id, node in self.nodes.items():
-            if before_node is not None and node_id >= before_node:
-                continue
-            if variable in node.variables_written:
-                candidates.append(node_id)
+        writers = self._writers.get(variable)
+        if not writers:
+            return None
+        if before_node is None:
+            return writers[-1]
+
+        # Most recent (highest ID) writer below before_node
+        index = bisect_left(writers, before_node) - 1
+        return writers[index] if index >= 0 else None
+
+    def iter_nodes(self) -> Iterator[dict]:
+        """Yield the serialized nodes one at a time"""
+        for node in self.nodes.values():
+            yield {
+                "id": node.id,
+                "statement": node.statement,
+                "type": node.statement_type,
+                "reads": list(node.variables_read),
+                "writes": list(node.variables_written)
+            }
+
+    def iter_edges(self) -> Iterator[dict]:
+        """Yield the serialized edges one at a time"""
+        for edge in self.edges:
+            yield {
+                "from": edge.from_node,
+                "to": edge.to_node,
+                "type": edge.edge_type,
+                "variable": edge.variable,
+                "label": edge.label
+            }
 
-        # Return the most recent (highest ID)
-        return max(candidates) if candidates else None
+    def iter_variables(self) -> Iterator[Tuple[str, dict]]:
+        """Yield (name, serialized variable) pairs one at a time"""
+        for name, var in self.variables.items():
+            yield name, {
+                "type": var.var_type.value,
+                "data_type": var.data_type,
+                "scope": var.scope
+            }
 
     def to_dict(self) -> dict:
         """Serialize PDG to dictionary for JSON/XML export"""
         return {
             "state_id": self.state_id,
-            "nodes": [
-                {
-                    "id": node.id,
-                    "statement": node.statement,
-                    "type": node.statement_type,
-                    "reads": list(node.variables_read),
-                    "writes": list(node.variables_written)
-                }
-                for node in self.nodes.values()
-            ],
-            "edges": [
-                {
-                    "from": edge.from_node,
-                    "to": edge.to_node,
-                    "type": edge.edge_type,
-                    "variable": edge.variable,
-                    "label": edge.label
-                }
-                for edge in self.edges
-            ],
-            "variables": {
-                name: {
-                    "type": var.var_type.value,
-                    "data_type": var.data_type,
-                    "scope": var.scope
-                }
-                for name, var in self.variables.items()
-            }
+            "nodes": list(self.iter_nodes()),
+            "edges": list(self.iter_edges()),
+            "variables": dict(self.iter_variables())
         }
 
+    def encode_json(self, fp: TextIO):
+        """
+        Write the PDG as JSON without materializing to_dict()
+
+        The output is identical to json.dump(self.to_dict(), fp), but nodes,
+        edges and variables are encoded and written one at a time.
+
+        Args:
+            fp: Text file-like object to write to
+        """
+        write = fp.write
+        write('{"state_id": ' + json.dumps(self.state_id))
+        for key, items in (("nodes", self.iter_nodes()), ("edges", self.iter_edges())):
+            write(', "' + key + '": [')
+            for index, item in enumerate(items):
+                if index:
+                    write(", ")
+                write(json.dumps(item))
+            write("]")
+        write(', "variables": {')
+        for index, (name, var) in enumerate(self.iter_variables()):
+            if index:
+                write(", ")
+            write(json.dumps(name) + ": " + json.dumps(var))
+        write("}}")
+
 
 # ============================================================================
 # VARIABLE CLASSIFICATION
 # ============================================================================
 
+def _pattern_literals(patterns: List[str]) -> Tuple[Tuple[str, ...], ...]:
+    """
+    Split classification patterns into their literal forms
+
+    Args:
+        patterns: Patterns of the form '^x.*', '.*x.*' or '.*x$', where x is
+            plain text
+
+    Returns:
+        Tuple of (prefixes, substrings, suffixes), lower-cased
+
+    Raises:
+        ValueError: If a pattern is not of one of these forms
+    """
+    prefixes, substrings, suffixes = [], [], []
+    for pattern in patterns:
+        if pattern.startswith('.*') and pattern.endswith('.*'):
+            text, forms = pattern[2:-2], substrings
+        elif pattern.startswith('.*') and pattern.endswith('$'):
+            text, forms = pattern[2:-1], suffixes
+        elif pattern.startswith('^') and pattern.endswith('.*'):
+            text, forms = pattern[1:-2], prefixes
+        else:
+            text, forms = '', None
+        if not text or re.escape(text) != text:
+            raise ValueError(f"Classification pattern is not a plain prefix, "
+                             f"substring or suffix: {pattern!r}")
+        forms.append(text.lower())
+    return tuple(prefixes), tuple(substrings), tuple(suffixes)
+
+
 class VariableClassifier:
     """Classifies PLC variables based on naming conventions and declaration context"""
 
@@ -220,6 +350,35 @@ class VariableClassifier:
         r'.*tol$'
     ]
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._compile_patterns()
+
+    @classmethod
+    def _compile_patterns(cls):
+        """
+        Derive the matchers of each category from its pattern list
+
+        ASCII names are checked against the literal forms of the patterns
+        (prefixes, substrings, suffixes) with plain string operations. Other
+        names go through the compiled patterns, where case-insensitive
+        matching folds e.g. 'ſ' to 's'. _VAR_CATEGORY_RE holds the three
+        alternations in order of precedence, each in a group named after its
+        VariableType value, so one match yields the VAR category.
+        """
+        categories = (
+            ('SENSING', VariableType.SENSING, cls.SENSING_PATTERNS),
+            ('ACTUATION', VariableType.ACTUATION, cls.ACTUATION_PATTERNS),
+            ('CONFIGURATION', VariableType.CONFIGURATION, cls.CONFIGURATION_PATTERNS),
+        )
+        groups = []
+        for name, var_type, patterns in categories:
+            alternation = "|".join(f"(?:{p})" for p in patterns)
+            setattr(cls, f"_{name}_LITERALS", _pattern_literals(patterns))
+            setattr(cls, f"_{name}_RE", re.compile(alternation, re.IGNORECASE))
+            groups.append(f"(?P<{var_type.value}>{alternation})")
+        cls._VAR_CATEGORY_RE = re.compile("|".join(groups), re.IGNORECASE)
+
     @classmethod
     def classify_variable(cls, var_name: str, scope: str) -> VariableType:
         """
@@ -237,7 +396,7 @@ class VariableClassifier:
         # Scope-based classification (strong signal)
         if scope == "input":
             # Most inputs are sensing, unless they're clearly configuration
-            if cls._matches_patterns(var_lower, cls.CONFIGURATION_PATTERNS):
+            if cls._matches(var_lower, cls._CONFIGURATION_LITERALS, cls._CONFIGURATION_RE):
                 return VariableType.CONFIGURATION
             return VariableType.SENSING
 
@@ -246,24 +405,43 @@ class VariableClassifier:
             return VariableType.ACTUATION
 
         # For VAR section, use pattern matching
-        if cls._matches_patterns(var_lower, cls.SENSING_PATTERNS):
+        if not var_lower.isascii():
+            match = cls._VAR_CATEGORY_RE.match(var_lower)
+            return VariableType(match.lastgroup) if match else VariableType.INTERNAL
+
+        if cls._matches(var_lower, cls._SENSING_LITERALS, cls._SENSING_RE):
             return VariableType.SENSING
 
-        if cls._matches_patterns(var_lower, cls.ACTUATION_PATTERNS):
+        if cls._matches(var_lower, cls._ACTUATION_LITERALS, cls._ACTUATION_RE):
             return VariableType.ACTUATION
 
-        if cls._matches_patterns(var_lower, cls.CONFIGURATION_PATTERNS):
+        if cls._matches(var_lower, cls._CONFIGURATION_LITERALS, cls._CONFIGURATION_RE):
             return VariableType.CONFIGURATION
 
         # Default to internal
         return VariableType.INTERNAL
 
     @staticmethod
-    def _matches_patterns(text: str, patterns: List[str]) -> bool:
-        """Check if text matches any regex pattern in the list"""
-        return any(re.match(pattern, text, re.IGNORECASE) for pattern in patterns)
+    def _matches(text: str, literals: Tuple[Tuple[str, ...], ...], compiled: re.Pattern) -> bool:
+        """Check if the lower-cased text matches any pattern of a category"""
+        if not text.isascii():
+            return compiled.match(text) is not None
+        prefixes, substrings, suffixes = literals
+        return (text.startswith(prefixes) or text.endswith(suffixes)
+                or any(sub in text for sub in substrings))
+
+
+VariableClassifier._compile_patterns()
 
 
+# Declaration section node types and the scope of the variables they declare,
+# in the order the sections are processed
+_DECLARATION_SCOPES = {
+    'input_declarations': "input",
+    'output_declarations': "output",
+    'var_declarations': "var",
+}
+
 def extract_variables_from_ast(ast: Any) -> Dict[str, Variable]:
     """
     Extract and classify all variables from the program AST
@@ -271,6 +449,19 @@ def extract_variables_from_ast(ast: Any) -> Dict[str, Variable]:
     Args:
         ast: Parsed AST from iec_st_compiler
 
+    Returns:
+        Dictionary mapping variable names to Variable objects
+    """
+    return _extract_variables(_index_ast(ast))
+
+
+def _extract_variables(index: Dict[str, List[Any]]) -> Dict[str, Variable]:
+    """
+    Extract and classify all variables from an indexed program AST
+
+    Args:
+        index: Node index of the program AST, as built by _index_ast
+
     Returns:
         Dictionary mapping variable names to Variable objects
     """
@@ -295,29 +486,98 @@ def extract_variables_from_ast(ast: Any) -> Dict[str, Variable]:
                         var_name, scope
                     )
 
-                    variables[var_name] = Variable(
+                    variable = Variable(
                         name=var_name,
                         var_type=var_type,
                         data_type=data_type,
                         scope=scope,
                         initial_value=initial_value
                     )
+                    variables[variable.name] = variable
 
-    # Extract from different declaration sections
-    input_nodes = _find_all_nodes(ast, 'input_declarations')
-    for node in input_nodes:
-        extract_from_decl_section(node, "input")
+    # Extract from different declaration sections (inputs, then outputs, then
+    # local variables, so that later sections override earlier ones)
+    for node_type, scope in _DECLARATION_SCOPES.items():
+        for node in index.get(node_type, ()):
+            extract_from_decl_section(node, scope)
 
-    output_nodes = _find_all_nodes(ast, 'output_declarations')
-    for node in output_nodes:
-        extract_from_decl_section(node, "output")
+    return variables
 
-    var_nodes = _find_all_nodes(ast, 'var_declarations')
 
-    for node in var_nodes:
-        extract_from_decl_section(node, "var")
+# Map AST node types to their string representation in expressions
+_OPERATOR_MAP = {
+    'less_or_equal': '<=',
+    'greater_or_equal': '>=',
+    'less_than': '<',
+    'greater_than': '>',
+    'equals': '=',
+    'not_equal': '<>',
+    'adding': '+',
+    'subtracting': '-',
+    'multiply_with': '*',
+    'divide_by': '/',
+    'logical_and': 'AND',
+    'logical_or': 'OR',
+    'logical_not': 'NOT',
+    'modulo': 'MOD',
+    'assign': ':=',
+}
+
+# Literal node types (constant values of assignments and initializations)
+_LITERAL_TYPES = frozenset(('boolean_literal', 'integer_literal', 'real_literal'))
+
+# Characters the spacing cleanup of formatted expressions applies to
+_EXPR_PUNCTUATION_RE = re.compile(r'[][().,]')
+
+# Stack marker for the end of the RHS subtree in PDGBuilder._visit_assignment
+_RHS_END = object()
+
+
+def _collect_expression_tokens(node: Any, parts: List[str]):
+    """Append the tokens of an expression AST node to parts, in order"""
+    # 1. Base case: String literal (leaf)
+    if isinstance(node, str):
+        parts.append(node)
+        return
 
-    return variables
+    # 2. Tuple node: (Type, Children...)
+    if isinstance(node, tuple):
+        node_type = node[0]
+
+        # FIX: Check if this node IS an operator
+        if node_type in _OPERATOR_MAP:
+            parts.append(_OPERATOR_MAP[node_type])
+
+        # Traverse children
+        for child in node[1:]:
+            _collect_expression_tokens(child, parts)
+        return
+
+    # 3. List of nodes
+    if isinstance(node, list):
+        for item in node:
+            _collect_expression_tokens(item, parts)
+        return
+
+
+def _join_expression_tokens(parts: List[str]) -> str:
+    """Join the tokens of an expression into a human-readable string"""
+    # Join parts. The AST leaves are the raw tokens.
+    text = " ".join(parts)
+
+    # Most expressions have no brackets, dots or commas to clean up
+    if _EXPR_PUNCTUATION_RE.search(text) is None:
+        return text
+
+    # Formatting cleanup to make the output valid ST code
+    text = text.replace(" (", "(").replace("( ", "(")
+    text = text.replace(" )", ")")
+    text = text.replace(" [", "[").replace("[ ", "[")
+    text = text.replace(" ]", "]")
+    text = text.replace(" . ", ".")
+    text = text.replace(" ,", ",")
+
+    return text
 
 
 class PDGBuilder:
@@ -325,6 +585,15 @@ class PDGBuilder:
 
     def __init__(self, variables: Dict[str, Variable]):
         self.variables = variables
+        # Read/write sets of the nodes built so far, so that identical sets
+        # (e.g. every condition reading the same sensor/target pair) share
+        # a single frozenset
+        self._name_sets: Dict[FrozenSet[str], FrozenSet[str]] = {}
+
+    def _shared_names(self, names: Iterable[str]) -> FrozenSet[str]:
+        """Return the builder's shared frozenset of the interned names"""
+        names = _intern_names(names)
+        return self._name_sets.setdefault(names, names)
 
     def build_pdg_for_state(self, state_id: str, case_element_ast: Any) -> ProgramDependencyGraph:
         """
@@ -346,13 +615,11 @@ class PDGBuilder:
         if not statement_list:
             return pdg
 
-        # Step 1: Create nodes for all statements
+        # Step 1: Create nodes for all statements, along with their control
+        # dependencies (each node only depends on its immediate controller)
         self._create_nodes_from_statements(pdg, statement_list)
 
-        # Step 2: Add control dependencies
-        self._add_control_dependencies(pdg)
-
-        # Step 3: Add data dependencies
+        # Step 2: Add data dependencies
         self._add_data_dependencies(pdg)
 
         return pdg
@@ -367,49 +634,54 @@ class PDGBuilder:
         return []
 
     def _create_nodes_from_statements(self, pdg: ProgramDependencyGraph,
-                                      statements: List[Any]):
+                                      statements: List[Any]) -> List[int]:
         """
         Create PDG nodes from a list of statements
 
         Args:
             pdg: The PDG being built
             statements: List of statement AST nodes
+
+        Returns:
+            IDs of the top-level nodes created (not those of nested blocks),
+            in creation order
         """
+        created = []
         for stmt in statements:
             if _is_node_type(stmt, 'assignment_statement'):
-                self._create_assignment_node(pdg, stmt)
+                created.append(self._create_assignment_node(pdg, stmt).id)
 
             elif _is_node_type(stmt, 'if_statement'):
-                self._create_if_statement_nodes(pdg, stmt)
+                created.extend(self._create_if_statement_nodes(pdg, stmt))
+
+        return created
 
     def _create_assignment_node(self, pdg: ProgramDependencyGraph, stmt_ast: Any) -> PDGNode:
         """Create a node for an assignment statement"""
-        # Extract LHS (variable being written)
-        lhs_var = self._extract_assignment_lhs(stmt_ast)
-
-        # Extract RHS (variables being read)
-        rhs_vars = self._extract_expression_variables(stmt_ast)
-
-        # Create human-readable statement
-        statement_str = self._format_assignment_statement(stmt_ast, lhs_var)
+        # Extract LHS (variable being written), RHS (variables being read)
+        # and the human-readable statement in a single walk
+        lhs_var, rhs_vars, statement_str = self._visit_assignment(stmt_ast)
 
         node = pdg.create_node(
             statement=statement_str,
             stmt_type="assignment",
-            reads=rhs_vars,
-            writes={lhs_var} if lhs_var else set(),
+            reads=self._shared_names(rhs_vars),
+            writes=self._shared_names((lhs_var,) if lhs_var else ()),
             ast_node=stmt_ast
         )
 
         return node
 
     def _create_if_statement_nodes(self, pdg: ProgramDependencyGraph,
-                                   if_stmt_ast: Any) -> int:
+                                   if_stmt_ast: Any) -> List[int]:
         """
         Create nodes for an if-statement (condition + body)
 
+        Control edges only go from a condition to the top-level nodes of its
+        blocks; nested nodes depend on their own (innermost) condition.
+
         Returns:
-            ID of the condition node
+            IDs of the condition node and of any ELSIF condition nodes
         """
         # Create condition node
         condition_vars = self._extract_condition_variables(if_stmt_ast)
@@ -418,27 +690,23 @@ class PDGBuilder:
         condition_node = pdg.create_node(
             statement=f"IF {condition_str}",
             stmt_type="condition",
-            reads=condition_vars,
-            writes=set(),
+            reads=self._shared_names(condition_vars),
+            writes=_EMPTY,
             ast_node=if_stmt_ast
         )
 
         # Process THEN block statements
         then_statements = self._extract_then_statements(if_stmt_ast)
-        then_start_id = pdg.next_node_id
-        self._create_nodes_from_statements(pdg, then_statements)
-        then_end_id = pdg.next_node_id - 1
+        then_ids = self._create_nodes_from_statements(pdg, then_statements)
 
         # Add control edges from condition to THEN block
-        for node_id in range(then_start_id, then_end_id + 1):
-            pdg.add_edge(PDGEdge(
-                from_node=condition_node.id,
-                to_node=node_id,
-                edge_type="control",
-                label="then"
-            ))
+        pdg.add_edges([
+            PDGEdge(condition_node.id, node_id, "control", label="then")
+            for node_id in then_ids
+        ])
 
         # Process ELSIF blocks if present
+        condition_ids = [condition_node.id]
         elsif_conditions = self._extract_elsif_blocks(if_stmt_ast)
         for elsif_condition_ast, elsif_statements in elsif_conditions:
             elsif_vars = self._extract_condition_variables(elsif_condition_ast)
@@ -447,90 +715,30 @@ class PDGBuilder:
             elsif_node = pdg.create_node(
                 statement=f"ELSIF {elsif_str}",
                 stmt_type="condition",
-                reads=elsif_vars,
-                writes=set(),
+                reads=self._shared_names(elsif_vars),
+                writes=_EMPTY,
                 ast_node=elsif_condition_ast
             )
+            condition_ids.append(elsif_node.id)
 
-            elsif_start_id = pdg.next_node_id
-            self._create_nodes_from_statements(pdg, elsif_statements)
-            elsif_end_id = pdg.next_node_id - 1
+            elsif_ids = self._create_nodes_from_statements(pdg, elsif_statements)
 
-            for node_id in range(elsif_start_id, elsif_end_id + 1):
-                pdg.add_edge(PDGEdge(
-                    from_node=elsif_node.id,
-                    to_node=node_id,
-                    edge_type="control",
-                    label="elsif"
-                ))
+            pdg.add_edges([
+                PDGEdge(elsif_node.id, node_id, "control", label="elsif")
+                for node_id in elsif_ids
+            ])
 
         # Process ELSE block if present
         else_statements = self._extract_else_statements(if_stmt_ast)
         if else_statements:
-            else_start_id = pdg.next_node_id
-            self._create_nodes_from_statements(pdg, else_statements)
-            else_end_id = pdg.next_node_id - 1
-
-            for node_id in range(else_start_id, else_end_id + 1):
-                pdg.add_edge(PDGEdge(
-                    from_node=condition_node.id,
-                    to_node=node_id,
-                    edge_type="control",
-                    label="else"
-                ))
-
-        return condition_node.id
-
-    @staticmethod
-    def _add_control_dependencies(pdg: ProgramDependencyGraph):
-        """
-        Refine control dependency edges.
-
-        During node creation, nested structures (like IF blocks) add edges from the
-        condition to *all* nested nodes. This results in transitive dependencies
-        (e.g., IF A -> IF B -> Stmt X results in edges A->X and B->X).
-
-        This method prunes these transitive edges to ensure each node only depends
-        on its immediate controller (the innermost predicate), forming a proper
-        Control Dependence Graph.
-        """
-        # We iterate over all nodes in the PDG to prune edges
-        for node_id in pdg.nodes:
-            preds = pdg.get_predecessors(node_id, edge_type="control")
-            if len(preds) <= 1:
-                continue
+            else_ids = self._create_nodes_from_statements(pdg, else_statements)
 
-            # Identify predecessors that are ancestors of other predecessors.
-            # If P1 -> P2 exists (control edge) and both P1, P2 -> Node,
-            # then P1 is the ancestor and should be removed for Node.
-            to_remove = set()
-            for p1 in preds:
-                for p2 in preds:
-                    if p1 == p2:
-                        continue
-
-                    # Check if p1 is a direct parent of p2
-                    is_parent = False
-                    for edge in pdg.edges:
-                        if edge.from_node == p1 and edge.to_node == p2 and edge.edge_type == "control":
-                            is_parent = True
-                            break
-
-                    if is_parent:
-                        # p1 dominates p2, so p1's influence on current node is transitive via p2.
-                        # We remove the direct edge p1 -> node to keep only the immediate parent.
-                        to_remove.add(p1)
-
-            # Remove the redundant edges
-            if to_remove:
-                new_edges = []
-                for edge in pdg.edges:
-                    # Keep edge if it's NOT one of the redundant ones targeting this node
-                    if edge.to_node == node_id and edge.from_node in to_remove and edge.edge_type == "control":
-                        continue
-                    new_edges.append(edge)
-                pdg.edges = new_edges
+            pdg.add_edges([
+                PDGEdge(condition_node.id, node_id, "control", label="else")
+                for node_id in else_ids
+            ])
 
+        return condition_ids
 
     @staticmethod
     def _add_data_dependencies(pdg: ProgramDependencyGraph):
@@ -542,15 +750,16 @@ class PDGBuilder:
         """
         # Build def-use chains
         last_def: Dict[str, int] = {}  # variable -> node_id of last definition
+        data_edges = []
 
-        # Process nodes in order
-        for node_id in sorted(pdg.nodes.keys()):
-            node = pdg.nodes[node_id]
+        # Process nodes in order (the builder creates them with increasing
+        # IDs, so insertion order is ID order)
+        for node_id, node in pdg.nodes.items():
 
             # For each variable read, add edge from its definition
             for var in node.variables_read:
                 if var in last_def:
-                    pdg.add_edge(PDGEdge(
+                    data_edges.append(PDGEdge(
                         from_node=last_def[var],
                         to_node=node_id,
                         edge_type="data",
@@ -562,31 +771,90 @@ class PDGBuilder:
             for var in node.variables_written:
                 last_def[var] = node_id
 
+        pdg.add_edges(data_edges)
+
 
     @staticmethod
-    def _extract_assignment_lhs(assignment_ast: Any) -> Optional[str]:
-        """Extract the left-hand side variable name from assignment"""
-        for item in _iterate_ast_list(assignment_ast):
-            if _is_node_type(item, 'variable_name'):
-                return _extract_text(item)
-        return None
+    def _visit_assignment(assignment_ast: Any) -> Tuple[Optional[str], Set[str], str]:
+        """
+        Analyze an assignment in one walk over its AST
+
+        Returns:
+            Tuple of the left-hand side variable name, all variable names
+            used in the statement and the human-readable statement
+        """
+        # The LHS is the first variable name among the direct children, the
+        # RHS the first expression (or else the first literal)
+        lhs_node = None
+        lhs = None
+        rhs_ast = None
+        rhs_literal = None
+        for child in _iterate_ast_list(assignment_ast):
+            if lhs_node is None and _is_node_type(child, 'variable_name'):
+                lhs_node = child
+                lhs = _extract_name(child)
+            elif rhs_ast is None and _is_node_type(child, 'expression'):
+                rhs_ast = child
+            elif (rhs_literal is None and isinstance(child, tuple) and child
+                  and child[0] in _LITERAL_TYPES):
+                rhs_literal = child
+        if rhs_ast is None:
+            rhs_ast = rhs_literal
+
+        # Collect the variables of the whole statement, and the tokens of the
+        # RHS while the walk is inside its subtree (until the end marker)
+        variables = set()
+        parts = []
+        formatting = False
+        format_rhs = bool(lhs and rhs_ast)
+
+        stack = [assignment_ast]
+        while stack:
+            node = stack.pop()
+            if node is _RHS_END:
+                formatting = False
+                continue
+
+            if format_rhs and node is rhs_ast:
+                format_rhs = False
+                formatting = True
+                stack.append(_RHS_END)
+
+            if isinstance(node, tuple) and len(node) > 0:
+                node_type = node[0]
+                if node_type == 'variable_name':
+                    # The LHS text is already known; don't extract it twice
+                    var_name = lhs if node is lhs_node else _extract_name(node)
+                    if var_name:
+                        variables.add(var_name)
+                if formatting and node_type in _OPERATOR_MAP:
+                    parts.append(_OPERATOR_MAP[node_type])
+            elif formatting and isinstance(node, str):
+                parts.append(node)
+
+            # Children pushed in reverse so they are visited in document order
+            stack.extend(reversed(_get_children(node)))
+
+        if lhs and rhs_ast:
+            return lhs, variables, f"{lhs} := {_join_expression_tokens(parts)}"
+        return lhs, variables, f"{lhs} := UNKNOWN"
 
     @staticmethod
     def _extract_expression_variables(expr_ast: Any) -> Set[str]:
         """Extract all variable names from an expression"""
         variables = set()
 
-        def traverse(node):
+        stack = [expr_ast]
+        while stack:
+            node = stack.pop()
             if _is_node_type(node, 'variable_name'):
-                var_name = _extract_text(node)
+                var_name = _extract_name(node)
                 if var_name:
                     variables.add(var_name)
 
-            # Recursively traverse children
-            for child in _iterate_ast_list(node):
-                traverse(child)
+            # Children pushed in reverse so they are visited in document order
+            stack.extend(reversed(_get_children(node)))
 
-        traverse(expr_ast)
         return variables
 
     def _extract_condition_variables(self, if_stmt_ast: Any) -> Set[str]:
@@ -693,30 +961,6 @@ class PDGBuilder:
 
         return []
 
-    def _format_assignment_statement(self, stmt_ast: Any, lhs: Optional[str]) -> str:
-        """Create a human-readable assignment statement"""
-        # FIX: Find the expression node specifically, don't format the whole statement
-        rhs_ast = None
-        for child in _iterate_ast_list(stmt_ast):
-            if _is_node_type(child, 'expression'):
-                rhs_ast = child
-                break
-
-        # Fallback: if no expression node found
-        if rhs_ast is None:
-            for child in _iterate_ast_list(stmt_ast):
-                if _is_node_type(child, 'boolean_literal') or \
-                        _is_node_type(child, 'integer_literal') or \
-                        _is_node_type(child, 'real_literal'):
-                    rhs_ast = child
-                    break
-
-        if lhs and rhs_ast:
-            rhs_str = self._format_expression_ast(rhs_ast)
-            return f"{lhs} := {rhs_str}"
-
-        return f"{lhs} := UNKNOWN"
-
     def _format_condition(self, if_stmt_ast: Any) -> str:
         """Format the condition of an if-statement"""
         for item in _iterate_ast_list(if_stmt_ast):
@@ -738,70 +982,20 @@ class PDGBuilder:
         (like function calls or array access) are preserved exactly as parsed.
         """
         parts = []
-
-        # Map AST node types to their string representation
-        operator_map = {
-            'less_or_equal': '<=',
-            'greater_or_equal': '>=',
-            'less_than': '<',
-            'greater_than': '>',
-            'equals': '=',
-            'not_equal': '<>',
-            'adding': '+',
-            'subtracting': '-',
-            'multiply_with': '*',
-            'divide_by': '/',
-            'logical_and': 'AND',
-            'logical_or': 'OR',
-            'logical_not': 'NOT',
-            'modulo': 'MOD',
-            'assign': ':=',
-        }
-
-        def traverse(node):
-            # 1. Base case: String literal (leaf)
-            if isinstance(node, str):
-                parts.append(node)
-                return
-
-            # 2. Tuple node: (Type, Children...)
-            if isinstance(node, tuple):
-                node_type = node[0]
-
-                # FIX: Check if this node IS an operator
-                if node_type in operator_map:
-                    parts.append(operator_map[node_type])
-
-                # Traverse children
-                for child in node[1:]:
-                    traverse(child)
-                return
-
-            # 3. List of nodes
-            if isinstance(node, list):
-                for item in node:
-                    traverse(item)
-                return
-
-        traverse(expr_ast)
-
-        # Join parts. The AST leaves are the raw tokens.
-        text = " ".join(parts)
-
-        # Formatting cleanup to make the output valid ST code
-        text = text.replace(" (", "(").replace("( ", "(")
-        text = text.replace(" )", ")")
-        text = text.replace(" [", "[").replace("[ ", "[")
-        text = text.replace(" ]", "]")
-        text = text.replace(" . ", ".")
-        text = text.replace(" ,", ",")
-
-        return text
+        _collect_expression_tokens(expr_ast, parts)
+        return _join_expression_tokens(parts)
 
 
 def _is_node_type(node: Any, node_type: str) -> bool:
-    """Check if an AST node is of a specific type"""
-    if isinstance(node, tuple) and len(node) > 0:
+    """
+    Check if an AST node is of a specific type
+
+    Node types are interned by the parser, and so are the identifier-like
+    string constants naming them here, so the comparison is usually settled
+    by identity. Equality is still required for ASTs whose strings are not
+    interned, e.g. unpickled ones.
+    """
+    if isinstance(node, tuple) and node:
         return node[0] == node_type
     return False
 
@@ -823,24 +1017,72 @@ def _iterate_ast_list(node: Any):
 
 def _get_children(node: Any) -> List[Any]:
     """Get all children of an AST node as a list"""
-    return list(_iterate_ast_list(node))
+    # Same children as _iterate_ast_list, built without a generator since
+    # every traversal calls this once per visited node
+    if isinstance(node, tuple):
+        children = []
+        for item in node[1:]:
+            if isinstance(item, list):
+                children.extend(item)
+            else:
+                children.append(item)
+        return children
+    if isinstance(node, list):
+        return list(node)
+    return []
 
 
 def _find_all_nodes(ast: Any, node_type: str) -> List[Any]:
-    """Find all nodes of a specific type in the AST"""
+    """Find all nodes of a specific type in the AST (in document order)"""
     results = []
 
-    def traverse(node):
-        if _is_node_type(node, node_type):
-            results.append(node)
+    stack = [ast]
+    while stack:
+        node = stack.pop()
+
+        # Children pushed in reverse so they are visited in document order
+        # (inlined _get_children, as this walk covers whole programs)
+        if isinstance(node, tuple):
+            if node and node[0] == node_type:
+                results.append(node)
+            for item in node[:0:-1]:
+                if isinstance(item, list):
+                    stack.extend(reversed(item))
+                else:
+                    stack.append(item)
+        elif isinstance(node, list):
+            stack.extend(reversed(node))
 
-        for child in _iterate_ast_list(node):
-            traverse(child)
-
-    traverse(ast)
     return results
 
 
+def _index_ast(ast: Any) -> Dict[str, List[Any]]:
+    """
+    Bucket every node of the AST by node type in a single traversal
+
+    Each bucket lists its nodes in document order, as _find_all_nodes would.
+    """
+    index: Dict[str, List[Any]] = {}
+    stack = [ast]
+    while stack:
+        node = stack.pop()
+
+        # Children pushed in reverse so they are visited in document order
+        # (inlined _get_children, as this walk covers whole programs)
+        if isinstance(node, tuple):
+            if node:
+                index.setdefault(node[0], []).append(node)
+            for item in node[:0:-1]:
+                if isinstance(item, list):
+                    stack.extend(reversed(item))
+                else:
+                    stack.append(item)
+        elif isinstance(node, list):
+            stack.extend(reversed(node))
+
+    return index
+
+
 def _extract_text(node: Any) -> Optional[str]:
     """Extract text content from a leaf node"""
 
@@ -858,92 +1100,92 @@ def _extract_text(node: Any) -> Optional[str]:
     return None
 
 
+def _extract_name(node: Any) -> Optional[str]:
+    """
+    Extract the text of a variable_name node as an interned string
+
+    All occurrences of a variable then share one string object, which keeps
+    the read/write sets and the use-def lookups on pointer-equal keys.
+    """
+    text = _extract_text(node)
+    return sys.intern(text) if text else text
+
+
 def _extract_variable_name(var_init_decl: Any) -> Optional[str]:
     """Extract variable name from var-init-decl node"""
-    for child in _iterate_ast_list(var_init_decl):
-        if _is_node_type(child, 'variable_name'):
-            return _extract_text(child)
-    return None
+    return next((_extract_name(child) for child in _iterate_ast_list(var_init_decl)
+                 if _is_node_type(child, 'variable_name')), None)
+
+
+# Type nodes of variable declarations: node type -> (data type, whether the
+# node is a type category, which contains the actual type, or a specific type)
+_TYPE_NODES = {
+    'real_type_name': ('REAL', True),
+    'integer_type_name': ('INT', True),
+    'bit_string_type_name': ('BOOL', True),
+    'type_bool': ('BOOL', False),
+    'type_int': ('INT', False),
+    'type_dint': ('DINT', False),
+    'type_sint': ('SINT', False),
+    'type_real': ('REAL', False),
+    'type_lreal': ('LREAL', False),
+    'type_word': ('WORD', False),
+    'type_dword': ('DWORD', False),
+    'type_uint': ('UINT', False),
+    'type_ulint': ('ULINT', False),
+}
+
+# Stack marker used by _extract_data_type for a type category's default
+_CATEGORY_DEFAULT = object()
 
 
 def _extract_data_type(var_init_decl: Any) -> str:
     """Extract data type from var-init-decl node"""
 
-    # Type category nodes (contain the actual type)
-    type_category_nodes = {
-        'real_type_name': 'REAL',
-        'integer_type_name': 'INT',
-        'bit_string_type_name': 'BOOL'
-    }
-
-    # Specific type nodes
-    specific_type_nodes = {
-        'type_bool': 'BOOL',
-        'type_int': 'INT',
-        'type_dint': 'DINT',
-        'type_sint': 'SINT',
-        'type_real': 'REAL',
-        'type_lreal': 'LREAL',
-        'type_word': 'WORD',
-        'type_dword': 'DWORD',
-        'type_uint': 'UINT',
-        'type_ulint': 'ULINT'
-    }
-
-    # Recursive search function
-    def search_for_type(node, depth=0):
-        if depth > 5:  # Prevent infinite recursion
-            return None
-
-        # Check if this node is a type category
+    # Depth-first search in document order. A type category node is answered
+    # by the first type found below it, or else by its own default, which a
+    # (_CATEGORY_DEFAULT, depth, default) entry pushed under its children holds.
+    stack = [(var_init_decl, 0, None)]
+    while stack:
+        node, depth, default = stack.pop()
+        if node is _CATEGORY_DEFAULT:
+            return default  # No specific type below the category node
+        if depth > 5:  # Limit the search depth
+            continue
+
+        # Check if this node is a type category or a specific type
         if isinstance(node, tuple) and len(node) > 0:
-            node_name = node[0]
-
-            # Check for type category nodes
-            if node_name in type_category_nodes:
-                # Look inside for specific type
-                for child in _iterate_ast_list(node):
-                    result = search_for_type(child, depth + 1)
-                    if result:
-                        return result
-                # If no specific type found, return the category default
-                return type_category_nodes[node_name]
-
-            # Check for specific type nodes
-            if node_name in specific_type_nodes:
-                return specific_type_nodes[node_name]
-
-        # Recursively search children
-        for child in _iterate_ast_list(node):
-            result = search_for_type(child, depth + 1)
-            if result:
-                return result
+            type_node = _TYPE_NODES.get(node[0])
+            if type_node is not None:
+                data_type, is_category = type_node
+                if not is_category:
+                    return data_type
 
-        return None
+                # Look inside for specific type before the category default
+                stack.append((_CATEGORY_DEFAULT, depth, data_type))
+
+        # Search children (pushed in reverse to visit them in document order)
+        depth += 1
+        for child in reversed(_get_children(node)):
+            stack.append((child, depth, None))
 
-    result = search_for_type(var_init_decl)
-    return result if result else "UNKNOWN"
+    return "UNKNOWN"
 
 
 def _extract_initial_value(var_init_decl: Any) -> Optional[str]:
     """Extract initial value from var-init-decl node"""
-    for child in _iterate_ast_list(var_init_decl):
-        if _is_node_type(child, 'expression'):
-            # Find literal value
-            for expr_child in _iterate_ast_list(child):
-                if _is_node_type(expr_child, 'integer_literal'):
-                    return _extract_text(expr_child)
-                elif _is_node_type(expr_child, 'real_literal'):
-                    return _extract_text(expr_child)
-                elif _is_node_type(expr_child, 'boolean_literal'):
-                    return _extract_text(expr_child)
-
-    return None
+    # First literal value directly below an expression child
+    return next((_extract_text(expr_child)
+                 for child in _iterate_ast_list(var_init_decl)
+                 if _is_node_type(child, 'expression')
+                 for expr_child in _iterate_ast_list(child)
+                 if isinstance(expr_child, tuple) and expr_child
+                 and expr_child[0] in _LITERAL_TYPES), None)
 
 
 
-def build_pdg_from_ast(program_ast: Any, state_id: str,
-                       case_element_ast: Any) -> ProgramDependencyGraph:
+def build_pdg_from_ast(program_ast: Any, state_id: str, case_element_ast: Any,
+                       variables: Optional[Dict[str, Variable]] = None) -> ProgramDependencyGraph:
     """
     High-level API to build a PDG from AST components
 
@@ -951,12 +1193,16 @@ def build_pdg_from_ast(program_ast: Any, state_id: str,
         program_ast: Full program AST (for variable extraction)
         state_id: State identifier
         case_element_ast: Case element AST node
+        variables: Variable table of the program, from
+            extract_variables_from_ast; pass it when building several states
+            of one program to extract the variables only once
 
     Returns:
         Complete ProgramDependencyGraph
     """
     # Step 1: Extract and classify variables
-    variables = extract_variables_from_ast(program_ast)
+    if variables is None:
+        variables = extract_variables_from_ast(program_ast)
 
     # Step 2: Build PDG
     builder = PDGBuilder(variables)
@@ -971,15 +1217,18 @@ def _extract_state_variable(case_stmt_ast: Any) -> Optional[str]:
     Structure: CASE <expression> OF ...
     """
 
-    # Helper to recursively find the first variable_name
+    # Helper to find the first variable_name (in document order)
     def find_first_var(node: Any) -> Optional[str]:
-        if _is_node_type(node, 'variable_name'):
-            return _extract_text(node)
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if _is_node_type(node, 'variable_name'):
+                res = _extract_name(node)
+                if res:
+                    return res
+                continue
 
-        for child in _iterate_ast_list(node):
-            res = find_first_var(child)
-            if res:
-                return res
+            stack.extend(reversed(_get_children(node)))
         return None
 
     # Iterate through CASE statement children to find the governing expression
@@ -1002,12 +1251,13 @@ def build_all_pdgs(program_ast: Any) -> Tuple[Dict[str, ProgramDependencyGraph],
     pdgs = {}
     state_variable = None
 
-    # Extract variables once
-    variables = extract_variables_from_ast(program_ast)
+    # Index the AST once for the variable extraction and the case lookup
+    index = _index_ast(program_ast)
+    variables = _extract_variables(index)
     builder = PDGBuilder(variables)
 
     # Find case statement
-    case_statements = _find_all_nodes(program_ast, 'case_statement')
+    case_statements = index.get('case_statement', [])
 
     if not case_statements:
 
@@ -1045,15 +1295,17 @@ def build_all_pdgs(program_ast: Any) -> Tuple[Dict[str, ProgramDependencyGraph],
 
 def _extract_state_id(case_element: Any) -> Optional[str]:
     """Extract the state ID from a case-element node"""
-    # Look for case-list -> case-list-element -> integer-literal
-    for child in _iterate_ast_list(case_element):
-        if _is_node_type(child, 'case_list'):
-            for list_child in _iterate_ast_list(child):
-                if _is_node_type(list_child, 'case_list_element'):
-                    for elem_child in _iterate_ast_list(list_child):
-                        if _is_node_type(elem_child, 'integer_literal'):
-                            text = _extract_text(elem_child)
-                            return text
+    # Look for case-list -> case-list-element -> integer-literal: a
+    # depth-first search in document order, descending one level per step
+    path = ('case_list', 'case_list_element', 'integer_literal')
+    stack = [(child, 0) for child in reversed(_get_children(case_element))]
+    while stack:
+        node, level = stack.pop()
+        if not _is_node_type(node, path[level]):
+            continue
+        if level == 2:
+            return _extract_text(node)
+        stack.extend((child, level + 1) for child in reversed(_get_children(node)))
     return None
 
 def _get_node_name(node: Any) -> str:
@@ -1068,6 +1320,47 @@ def _get_node_name(node: Any) -> str:
         return str(type(node))
 
 
+# Fill colors of PDG nodes by statement type (white for any other type)
+_PDG_NODE_COLORS = {
+    'assignment': 'lightblue',
+    'condition': 'lightyellow',
+    'if_block': 'lightgreen',
+}
+
+# Style and color of PDG edges by edge type (data edges' for any other type)
+_DATA_EDGE_ATTRS = ('dashed', 'blue')
+_EDGE_ATTRS = {
+    'control': ('solid', 'red'),
+    'data': _DATA_EDGE_ATTRS,
+}
+
+
+def _dot_escape(text: str) -> str:
+    """
+    Escape text for use inside a quoted DOT string
+
+    Backslashes are escaped first so that they cannot start an escape
+    sequence. Chained str.replace calls are used rather than str.translate,
+    which is several times slower for multi-character replacements. Most
+    labels contain none of the escaped characters and are returned as is.
+
+    Args:
+        text: Raw label text
+
+    Returns:
+        Text with backslashes, double quotes and newlines escaped
+    """
+    if '\\' in text or '"' in text or '\n' in text:
+        return text.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return text
+
+
+# DOT output of rendered PDGs: pdg -> (graph state when rendered, DOT string).
+# The state covers the graph's mutators and the sizes of its node and edge
+# collections; changes made to nodes or edges in place are not detected.
+_DOT_CACHE: "WeakKeyDictionary[ProgramDependencyGraph, Tuple[tuple, str]]" = WeakKeyDictionary()
+
+
 def pdg_to_graphviz(pdg: ProgramDependencyGraph) -> str:
     """
     Generate a Graphviz DOT representation of the PDG
@@ -1078,31 +1371,67 @@ def pdg_to_graphviz(pdg: ProgramDependencyGraph) -> str:
     Returns:
         DOT format string
     """
-    dot = f'digraph "PDG_State_{pdg.state_id}" {{\n'
-    dot += '    rankdir=TB;\n'
-    dot += '    node [shape=box];\n\n'
+    state = (pdg._version, pdg.state_id, len(pdg.nodes), len(pdg.edges))
+    cached = _DOT_CACHE.get(pdg)
+    if cached is not None and cached[0] == state:
+        return cached[1]
+
+    parts = []
+    pdg_to_graphviz_stream(pdg, parts.append)
+    dot = ''.join(parts)
+
+    _DOT_CACHE[pdg] = (state, dot)
+    return dot
+
+
+def pdg_to_graphviz_stream(pdg: ProgramDependencyGraph, write: Callable[[str], Any]):
+    """
+    Write a Graphviz DOT representation of the PDG line by line
+
+    Args:
+        pdg: Program Dependency Graph
+        write: Callable receiving the DOT text in order (e.g. a file's write
+            method), so that the whole text is never held in memory
+    """
+    write(f'digraph "PDG_State_{pdg.state_id}" {{\n'
+          '    rankdir=TB;\n'
+          '    node [shape=box];\n\n')
+
+    pdg_dot_statements_stream(pdg, write, separator='\n')
+    write('}\n')
+
+
+def pdg_dot_statements_stream(pdg: ProgramDependencyGraph, write: Callable[[str], Any],
+                              node_prefix: str = 'node', indent: str = '    ',
+                              separator: str = ''):
+    """
+    Write the DOT node and edge statements of the PDG, one line each
+
+    Shared by the single-graph and the multi-state writers, which differ
+    only in how nodes are named and in the graph or subgraph around them.
 
+    Args:
+        pdg: Program Dependency Graph
+        write: Callable receiving the DOT text in order
+        node_prefix: Prefix of the DOT node names, followed by the node ID
+        indent: Indentation of every statement line
+        separator: Text written between the node and the edge statements
+    """
     # Add nodes
-    for node_id, node in pdg.nodes.items():
-        label = node.statement.replace('"', '\\"')
-        color = {
-            'assignment': 'lightblue',
-            'condition': 'lightyellow',
-            'if_block': 'lightgreen'
-        }.get(node.statement_type, 'white')
+    for node in pdg.nodes.values():
+        label = _dot_escape(node.statement)
+        color = _PDG_NODE_COLORS.get(node.statement_type, 'white')
 
-        dot += f'    node{node_id} [label="{label}", fillcolor={color}, style=filled];\n'
+        write(f'{indent}{node_prefix}{node.id} [label="{label}", '
+              f'fillcolor={color}, style=filled];\n')
 
-    dot += '\n'
+    if separator:
+        write(separator)
 
     # Add edges
     for edge in pdg.edges:
-        style = 'solid' if edge.edge_type == 'control' else 'dashed'
-        color = 'red' if edge.edge_type == 'control' else 'blue'
+        style, color = _EDGE_ATTRS.get(edge.edge_type, _DATA_EDGE_ATTRS)
         label = edge.label or edge.variable or ''
 
-        dot += f'    node{edge.from_node} -> node{edge.to_node} '
-        dot += f'[style={style}, color={color}, label="{label}"];\n'
-
-    dot += '}\n'
-    return dot
\ No newline at end of file
+        write(f'{indent}{node_prefix}{edge.from_node} -> {node_prefix}{edge.to_node} '
+              f'[style={style}, color={color}, label="{label}"];\n')